@@ -0,0 +1,334 @@
+#!/usr/bin/python3
+"""
+ASGI entry point of the AirBnB clone API, e.g.
+    uvicorn api.v1.asgi:app --host 0.0.0.0 --port 5000
+
+Requests are routed with the url map of the Flask app, so the ASGI server
+answers the same app_views routes. With the database storage the read
+views below (status, stats, the lists and the single objects) run as
+coroutines on AsyncDBStorage: a request waiting on the database holds no
+thread, so a single process keeps thousands of them in flight. Every other
+request (the writes, the searches, file storage) is handed to the Flask
+app in a pool of HBNB_ASGI_THREADS threads (default 16).
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import io
+import os
+import sys
+from urllib.parse import parse_qs
+from werkzeug.exceptions import HTTPException
+from werkzeug.http import parse_etags, quote_etag
+import models
+from api.v1.app import app as flask_app
+from api.v1.views.conditional import make_etag, object_etag
+from api.v1.views.pagination import STREAM_CHUNK, encode_cursor
+from api.v1.views.pagination import parse_page_args
+from models.engine.json_backend import dumps
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+# endpoint -> (class, not found message) of the single object views
+objects = {
+    "app_views.get_state": (State, "Not found"),
+    "app_views.get_city": (City, "Not found"),
+    "app_views.get_amenity": (Amenity, "Not found"),
+    "app_views.get_user": (User, "Not found"),
+    "app_views.get_place": (Place, "Place not found"),
+    "app_views.get_review": (Review, "Review not found"),
+}
+# endpoint -> (class, parent class, parent id column, parent not found
+#              message) of the list views
+lists = {
+    "app_views.get_states": (State, None, None, None),
+    "app_views.get_all_amenities": (Amenity, None, None, None),
+    "app_views.get_all_users": (User, None, None, None),
+    "app_views.get_cities_by_state": (City, State, "state_id", "Not found"),
+    "app_views.get_places_by_city": (Place, City, "city_id",
+                                     "City not found"),
+    "app_views.get_reviews_by_place": (Review, Place, "place_id",
+                                       "Place not found"),
+}
+# the resource names of /stats
+stats_names = {"Amenity": "amenities", "City": "cities", "Place": "places",
+               "Review": "reviews", "State": "states", "User": "users"}
+
+
+class Request:
+    """the parts of an ASGI request the async views read"""
+
+    def __init__(self, scope):
+        """reads the path, query string and headers of scope"""
+        self.path = scope["path"]
+        query = scope.get("query_string", b"").decode("latin-1")
+        self.full_path = self.path + "?" + query
+        self.args = {name: values[0] for name, values in
+                     parse_qs(query, keep_blank_values=True).items()}
+        self.headers = {name.decode("latin-1").lower():
+                        value.decode("latin-1")
+                        for name, value in scope.get("headers", ())}
+
+    def not_modified(self, etag):
+        """tells if the client already holds etag"""
+        return etag in parse_etags(self.headers.get("if-none-match"))
+
+
+def json_response(data, status=200, headers=()):
+    """returns the (status, headers, body chunks) of data as JSON"""
+    return status, [("Content-Type", "application/json")] + list(headers), \
+        [dumps(data).encode()]
+
+
+def not_modified_response(etag):
+    """returns the empty 304 response of etag"""
+    return 304, [("ETag", quote_etag(etag))], []
+
+
+def list_chunks(objs):
+    """returns the encoded JSON list of objs in chunks of STREAM_CHUNK"""
+    chunks = []
+    chunk = ["["]
+    size = 0
+    sep = ""
+    for obj in objs:
+        part = sep + dumps(obj.to_dict())
+        sep = ","
+        chunk.append(part)
+        size += len(part)
+        if size >= STREAM_CHUNK:
+            chunks.append("".join(chunk).encode())
+            chunk = []
+            size = 0
+    chunk.append("]")
+    chunks.append("".join(chunk).encode())
+    return chunks
+
+
+async def get_status(storage, request):
+    """Returns the status of the API"""
+    return json_response({"status": "OK"})
+
+
+async def get_stats(storage, request):
+    """Returns the number of each objects by type, with a list ETag"""
+    names = sorted(stats_names)
+    versions = await storage.versions(names)
+    etag = make_etag(request.full_path, *[versions[name] for name in names])
+    if request.not_modified(etag):
+        return not_modified_response(etag)
+    counts = await storage.counts(names)
+    return json_response({stats_names[name]: counts[name]
+                          for name in names},
+                         headers=[("ETag", quote_etag(etag))])
+
+
+async def get_object(storage, request, endpoint, id):
+    """Returns the object of an objects endpoint, or 304 if unchanged"""
+    cls, message = objects[endpoint]
+    obj = await storage.get(cls, id)
+    if obj is None:
+        return json_response({"error": message}, 404)
+    etag = object_etag(obj)
+    if request.not_modified(etag):
+        return not_modified_response(etag)
+    return json_response(obj.to_dict(), headers=[("ETag", quote_etag(etag))])
+
+
+async def get_list(storage, request, endpoint, id=None):
+    """Returns one page, or all, of a lists endpoint with its ETag"""
+    cls, parent, column, message = lists[endpoint]
+    names = [cls.__name__] if parent is None else \
+        [parent.__name__, cls.__name__]
+    versions = await storage.versions(names)
+    etag = make_etag(request.full_path, *[versions[name] for name in names])
+    if request.not_modified(etag):
+        return not_modified_response(etag)
+    if parent is not None and await storage.get(parent, id) is None:
+        return json_response({"error": message}, 404)
+    try:
+        limit, after = parse_page_args(request.args.get("limit"),
+                                       request.args.get("cursor"))
+    except ValueError as error:
+        return json_response({"error": str(error)}, 400)
+    if parent is None:
+        objs = await storage.all(cls, limit and limit + 1, after)
+    else:
+        objs = await storage.all_by(cls, column, id, limit and limit + 1,
+                                    after)
+    objs = list(objs.values())
+    headers = [("Content-Type", "application/json"),
+               ("ETag", quote_etag(etag))]
+    if limit is not None and len(objs) > limit:
+        objs = objs[:limit]
+        headers.append(("X-Next-Cursor", encode_cursor(objs[-1])))
+    return 200, headers, list_chunks(objs)
+
+
+def wsgi_environ(scope, body):
+    """returns the WSGI environ of the ASGI http scope and request body"""
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", "").encode().decode("latin-1"),
+        "PATH_INFO": scope["path"].encode().decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "SERVER_PROTOCOL": "HTTP/" + scope.get("http_version", "1.1"),
+        "REMOTE_ADDR": client[0],
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": io.BytesIO(body),
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": False,
+        "wsgi.run_once": False,
+        "CONTENT_LENGTH": str(len(body)),
+    }
+    for name, value in scope.get("headers", ()):
+        name = name.decode("latin-1").upper().replace("-", "_")
+        value = value.decode("latin-1")
+        if name == "CONTENT_TYPE":
+            environ[name] = value
+        elif name != "CONTENT_LENGTH":
+            name = "HTTP_" + name
+            environ[name] = environ[name] + "," + value \
+                if name in environ else value
+    return environ
+
+
+class AsyncApp:
+    """ASGI application serving the routes of the Flask app wsgi"""
+
+    def __init__(self, wsgi, storage=None, threads=16):
+        """serves the async views on storage, the rest with wsgi"""
+        self.wsgi = wsgi
+        self.storage = storage
+        self.executor = ThreadPoolExecutor(threads)
+        self.__ready = None
+
+    async def __call__(self, scope, receive, send):
+        """handles one ASGI connection scope"""
+        if scope["type"] == "lifespan":
+            return await self.lifespan(receive, send)
+        if scope["type"] != "http":
+            return
+        view = self.match(scope)
+        if view is None:
+            return await self.call_wsgi(scope, receive, send)
+        await self.ready()
+        try:
+            status, headers, chunks = await view(self.storage,
+                                                 Request(scope))
+        finally:
+            await self.storage.close()
+        await self.respond(send, status, headers, chunks)
+
+    async def lifespan(self, receive, send):
+        """opens the storage at startup and closes it at shutdown"""
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                if self.storage is not None:
+                    await self.ready()
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self.storage is not None:
+                    await self.storage.dispose()
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def ready(self):
+        """reloads the storage once, on the first call"""
+        if self.__ready is None:
+            self.__ready = asyncio.ensure_future(self.storage.reload())
+        await self.__ready
+
+    def match(self, scope):
+        """returns the async view of the request, None to use wsgi"""
+        if self.storage is None or scope["method"] != "GET":
+            return None
+        try:
+            endpoint, args = self.wsgi.url_map.bind(
+                "", script_name=scope.get("root_path") or None).match(
+                scope["path"], scope["method"])
+        except HTTPException:
+            return None
+        if endpoint == "app_views.get_status":
+            return get_status
+        if endpoint == "app_views.get_stats":
+            return get_stats
+        if endpoint in objects:
+            return lambda storage, request: get_object(
+                storage, request, endpoint, *args.values())
+        if endpoint in lists:
+            return lambda storage, request: get_list(
+                storage, request, endpoint, *args.values())
+        return None
+
+    @staticmethod
+    async def respond(send, status, headers, chunks):
+        """sends the response, one body message per chunk"""
+        headers = [(name.lower().encode("latin-1"), value.encode("latin-1"))
+                   for name, value in headers]
+        if status != 304:
+            headers.append((b"content-length",
+                            str(sum(map(len, chunks))).encode()))
+        await send({"type": "http.response.start", "status": status,
+                    "headers": headers})
+        for chunk in chunks:
+            await send({"type": "http.response.body", "body": chunk,
+                        "more_body": True})
+        await send({"type": "http.response.body", "body": b""})
+
+    async def call_wsgi(self, scope, receive, send):
+        """runs the request through the Flask app in the thread pool"""
+        body = bytearray()
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            body += message.get("body", b"")
+            if not message.get("more_body"):
+                break
+        environ = wsgi_environ(scope, bytes(body))
+        status, headers, chunks = await asyncio.get_running_loop(). \
+            run_in_executor(self.executor, self.run_wsgi, environ)
+        await self.respond(send, status, headers, chunks)
+
+    def run_wsgi(self, environ):
+        """returns (status, headers, body chunks) of the wsgi app"""
+        started = []
+
+        def start_response(status, headers, exc_info=None):
+            """records the status and headers"""
+            started[:] = [int(status.split(" ", 1)[0]), headers]
+
+        result = self.wsgi(environ, start_response)
+        try:
+            chunks = [chunk for chunk in result if chunk]
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        headers = [(name, value) for name, value in started[1]
+                   if name.lower() != "content-length"]
+        return started[0], headers, chunks
+
+
+def create_app():
+    """returns the ASGI app of the storage engine in use"""
+    storage = None
+    if models.storage_t == "db":
+        from models.engine.async_db_storage import AsyncDBStorage
+        storage = AsyncDBStorage()
+    return AsyncApp(flask_app, storage,
+                    int(os.getenv("HBNB_ASGI_THREADS", 16)))
+
+
+app = create_app()
@@ -10,6 +10,8 @@ It imports all the view modules required for handling different resources like:
 - Places
 - Place Reviews
 - Place Amenities
+- Batch (bulk create/update/delete)
+- Metrics (latency, storage and serialization)
 """
 from flask import Blueprint
 
@@ -24,3 +26,5 @@ from api.v1.views.users import *  # Import the users view
 from api.v1.views.places import *  # Import the places  view
 from api.v1.views.places_reviews import *  # Import the places_reviews view
 from api.v1.views.places_amenities import *  # Places-amenities view
+from api.v1.views.batch import *  # Bulk create/update/delete views
+from api.v1.views.metrics import *  # Request and storage metrics
@@ -3,6 +3,9 @@
 
 from flask import jsonify, request
 from api.v1.views import app_views
+from api.v1.views.conditional import conditional, object_response
+from api.v1.views.cache import cached
+from api.v1.views.pagination import list_response
 from models import storage
 from models.amenity import Amenity
 
@@ -10,10 +13,12 @@ from models.amenity import Amenity
 @app_views.route(
     '/amenities', methods=['GET'], strict_slashes=False
 )
+@conditional("Amenity")
+@cached("Amenity")
 def get_all_amenities():
-    """Retrieve the list of all Amenity objects"""
-    amenities = storage.all(Amenity)  # Get all amenities
-    return jsonify([amenity.to_dict() for amenity in amenities.values()])
+    """Retrieve the list of all Amenity objects, one page at a time"""
+    # Page requested with ?limit=&cursor=, all of them streamed without
+    return list_response(Amenity)
 
 
 @app_views.route(
@@ -24,7 +29,7 @@ def get_amenity(amenity_id):
     amenity = storage.get(Amenity, amenity_id)  # Retrieves amenity by its ID
     if not amenity:
         return jsonify({"error": "Not found"}), 404
-    return jsonify(amenity.to_dict())
+    return object_response(amenity)
 
 
 @app_views.route(
@@ -70,5 +75,5 @@ def update_amenity(amenity_id):
     for key, value in data.items():
         if key not in ['id', 'created_at', 'updated_at']:  # Ignore the fields
             setattr(amenity, key, value)  # Update amenity with new value
-    storage.save()  # Save the changes to storage
+    amenity.save()  # Save the changes to storage
     return jsonify(amenity.to_dict())  # Return updated amenity-status 200
@@ -0,0 +1,144 @@
+#!/usr/bin/python3
+"""Bulk create, update and delete views
+
+`POST /api/v1/<resource>/batch` takes a JSON object with any of:
+- "create": a list of objects to create, parents given by their ids
+  (e.g. "city_id" and "user_id" for places)
+- "update": a list of objects with their "id" and the fields to change
+- "delete": a list of ids
+
+Every item is validated like its single object view. The objects and
+parents the items refer to are read with one storage.get_many() per
+class, the valid items are staged and persisted with a single
+storage.save(), and the response holds one {"status", "object" or
+"error"} result per item, in order.
+"""
+from datetime import datetime
+from os import getenv
+from flask import jsonify, request
+from api.v1.views import app_views
+from models import storage
+from models.amenity import Amenity
+from models.city import City
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+# int - items accepted in one batch
+BATCH_MAX = int(getenv("HBNB_API_BATCH_MAX", 1000))
+# fields no request sets, amenities are linked to places through
+# /places/<place_id>/amenities/<amenity_id>
+PROTECTED = ("id", "created_at", "updated_at", "__class__", "amenity_ids")
+
+# resource -> (class, required fields, parent id fields -> parent class,
+#              fields an update leaves unchanged)
+resources = {
+    "amenities": (Amenity, ("name",), {}, ()),
+    "cities": (City, ("name",), {"state_id": State}, ("state_id",)),
+    "places": (Place, ("name",), {"city_id": City, "user_id": User},
+               ("city_id", "user_id")),
+    "reviews": (Review, ("text",), {"place_id": Place, "user_id": User},
+                ("place_id", "user_id")),
+    "states": (State, ("name",), {}, ()),
+    "users": (User, ("email", "password"), {}, ("email",)),
+}
+
+
+def error(status, message):
+    """Return the result of an item that failed"""
+    return {"status": status, "error": message}
+
+
+def prefetch(cls, parents, items):
+    """Return class -> {id: object} of the objects the items refer to
+
+    One get_many() per class reads the parents of the creates and the
+    objects of the updates and deletes.
+    """
+    wanted = {parent: [] for parent in parents.values()}
+    wanted[cls] = list(items["delete"])
+    for data in items["create"]:
+        if isinstance(data, dict):
+            for field, parent in parents.items():
+                wanted[parent].append(data.get(field))
+    wanted[cls].extend(data.get("id") for data in items["update"]
+                       if isinstance(data, dict))
+    return {c: storage.get_many(c, ids) for c, ids in wanted.items()}
+
+
+def create_item(cls, required, parents, data, found):
+    """Stage the creation of one object, return its result"""
+    if not isinstance(data, dict):
+        return error(400, "Not a JSON")
+    for field in tuple(parents) + required:
+        if field not in data:
+            return error(400, "Missing {}".format(field))
+    for field, parent in parents.items():
+        if not isinstance(data[field], str) or \
+                data[field] not in found[parent]:
+            return error(404, "{} not found".format(parent.__name__))
+    obj = cls(**{key: value for key, value in data.items()
+                 if key not in PROTECTED})
+    storage.new(obj)
+    return {"status": 201, "object": obj}
+
+
+def update_item(cls, ignored, data, found):
+    """Stage the update of one object, return its result"""
+    if not isinstance(data, dict):
+        return error(400, "Not a JSON")
+    if "id" not in data:
+        return error(400, "Missing id")
+    obj = found[cls].get(data["id"]) if isinstance(data["id"], str) \
+        else None
+    if not obj:
+        return error(404, "Not found")
+    for key, value in data.items():
+        if key not in PROTECTED and key not in ignored:
+            setattr(obj, key, value)
+    obj.updated_at = datetime.utcnow()
+    storage.new(obj)
+    return {"status": 200, "object": obj}
+
+
+def delete_item(cls, id, found):
+    """Stage the deletion of one object, return its result"""
+    # popped, so the same id deleted twice is not found the second time
+    obj = found[cls].pop(id, None) if isinstance(id, str) else None
+    if not obj:
+        return error(404, "Not found")
+    storage.delete(obj)
+    return {"status": 200, "id": id}
+
+
+@app_views.route('/<resource>/batch', methods=['POST'], strict_slashes=False)
+def batch(resource):
+    """Create, update and delete objects of a resource with one save"""
+    if resource not in resources:
+        return jsonify({"error": "Not found"}), 404
+    cls, required, parents, ignored = resources[resource]
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({"error": "Not a JSON"}), 400
+    items = {op: data.get(op, []) for op in ("create", "update", "delete")}
+    if not all(isinstance(ops, list) for ops in items.values()):
+        return jsonify({"error": "Not a list"}), 400
+    if sum(len(ops) for ops in items.values()) > BATCH_MAX:
+        return jsonify({"error": "Batch too large"}), 400
+    found = prefetch(cls, parents, items)
+    results = {
+        "create": [create_item(cls, required, parents, item, found)
+                   for item in items["create"]],
+        "update": [update_item(cls, ignored, item, found)
+                   for item in items["update"]],
+        "delete": [delete_item(cls, id, found) for id in items["delete"]],
+    }
+    if any("error" not in result
+           for ops in results.values() for result in ops):
+        storage.save()
+    for ops in results.values():
+        for result in ops:
+            if "object" in result:
+                result["object"] = result["object"].to_dict()
+    return jsonify(results)
@@ -0,0 +1,149 @@
+#!/usr/bin/python3
+"""In-process cache of the responses of read-heavy GET views
+
+A view decorated with @cached("State", ...) has its 200 responses kept
+per path and query string for HBNB_API_CACHE_TTL seconds (default 60),
+least recently used entries being evicted past HBNB_API_CACHE_SIZE
+entries (default 256). A TTL of 0 turns the cache off. Entries are
+keyed by the storage.versions() of the classes they were built from as
+well, the ones the list ETag is made of, so a body is only served under
+the ETag it was built with, even after a write by another process.
+Entries are also dropped as soon as this process' storage reports a
+change to one of their classes, so only the cache of a class written to
+is lost.
+"""
+from collections import OrderedDict
+from functools import wraps
+from os import getenv
+import threading
+import time
+from flask import Response, make_response, request
+from api.v1.views.conditional import class_versions
+from models import storage
+
+# response headers stored along with the body
+CACHED_HEADERS = ("Content-Type", "X-Next-Cursor")
+
+
+class ResponseCache:
+    """LRU cache of response bodies with a TTL and per class invalidation"""
+
+    def __init__(self, size=256, ttl=60):
+        """creates an empty cache of size entries living ttl seconds"""
+        self.size = size
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+        # key -> (expiry time, class names, (body, status, headers))
+        self.__entries = OrderedDict()
+        # class name -> number of times it was invalidated
+        self.__versions = {}
+        self.__lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        """tells if responses are cached at all"""
+        return self.ttl > 0 and self.size > 0
+
+    def version(self, names):
+        """returns the invalidation counters of the class names"""
+        with self.__lock:
+            return tuple(self.__versions.get(name, 0) for name in names)
+
+    def get(self, key):
+        """returns the live entry value of key, None on a miss"""
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None or entry[0] < time.monotonic():
+                if entry is not None:
+                    del self.__entries[key]
+                self.misses += 1
+                return None
+            self.__entries.move_to_end(key)
+            self.hits += 1
+            return entry[2]
+
+    def put(self, key, value, names, version):
+        """stores value under key unless names changed since version"""
+        with self.__lock:
+            if tuple(self.__versions.get(name, 0)
+                     for name in names) != version:
+                return
+            self.__entries[key] = (time.monotonic() + self.ttl,
+                                   frozenset(names), value)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.size:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, names):
+        """drops the entries built from any of the class names"""
+        with self.__lock:
+            for name in names:
+                self.__versions[name] = self.__versions.get(name, 0) + 1
+            stale = [key for key, entry in self.__entries.items()
+                     if not entry[1].isdisjoint(names)]
+            for key in stale:
+                del self.__entries[key]
+            self.invalidations += len(stale)
+
+    def clear(self):
+        """drops every entry"""
+        with self.__lock:
+            self.__entries.clear()
+
+    def stats(self):
+        """returns the entry count and the hit, miss and eviction counters"""
+        with self.__lock:
+            return {"entries": len(self.__entries), "size": self.size,
+                    "ttl": self.ttl, "hits": self.hits,
+                    "misses": self.misses, "evictions": self.evictions,
+                    "invalidations": self.invalidations}
+
+
+cache = ResponseCache(int(getenv("HBNB_API_CACHE_SIZE", 256)),
+                      float(getenv("HBNB_API_CACHE_TTL", 60)))
+storage.subscribe(cache.invalidate)
+
+
+def cached(*names):
+    """caches the 200 responses of a GET view built from the class names"""
+    def decorator(view):
+        """wraps view with the cache lookup"""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            """returns the cached response or caches the view's one"""
+            if not cache.enabled:
+                return view(*args, **kwargs)
+            key = (request.path,
+                   tuple(sorted(request.args.items(multi=True))),
+                   class_versions(names))
+            value = cache.get(key)
+            if value is not None:
+                body, status, headers = value
+                return Response(body, status, headers)
+            version = cache.version(names)
+            response = make_response(view(*args, **kwargs))
+            if response.status_code != 200:
+                return response
+            headers = [(name, value) for name, value in response.headers
+                       if name in CACHED_HEADERS]
+            if not response.is_streamed:
+                cache.put(key, (response.get_data(), 200, headers),
+                          names, version)
+                return response
+
+            def tee(chunks):
+                """streams chunks, caching the body once all were sent"""
+                body = []
+                for chunk in chunks:
+                    body.append(chunk)
+                    yield chunk
+                cache.put(key, (b"".join(body), 200, headers),
+                          names, version)
+            response.response = tee(response.iter_encoded())
+            return response
+        return wrapper
+    return decorator
@@ -3,6 +3,9 @@
 
 from flask import jsonify, request
 from api.v1.views import app_views
+from api.v1.views.conditional import conditional, object_response
+from api.v1.views.cache import cached
+from api.v1.views.pagination import list_response
 from models import storage
 from models.city import City
 from models.state import State
@@ -11,16 +14,15 @@ from models.state import State
 @app_views.route(
     '/states/<state_id>/cities', methods=['GET'], strict_slashes=False
 )
+@conditional("State", "City")
+@cached("State", "City")
 def get_cities_by_state(state_id):
     """Retrieve the list of all City objects of a specific State"""
     state = storage.get(State, state_id)  # Retrieve the state by its ID
     if not state:
         return jsonify({"error": "Not found"}), 404
-    cities = storage.all(City)  # Get all cities
-    state_cities = [
-        city.to_dict() for city in cities.values() if city.state_id == state_id
-    ]
-    return jsonify(state_cities)
+    # Page requested with ?limit=&cursor=, all of them streamed without
+    return list_response(City, "state_id", state_id)
 
 
 @app_views.route('/cities/<city_id>', methods=['GET'], strict_slashes=False)
@@ -29,7 +31,7 @@ def get_city(city_id):
     city = storage.get(City, city_id)  # Retrieve the city by its ID
     if not city:
         return jsonify({"error": "Not found"}), 404
-    return jsonify(city.to_dict())
+    return object_response(city)
 
 
 @app_views.route('/cities/<city_id>', methods=['DELETE'], strict_slashes=False)
@@ -78,5 +80,5 @@ def update_city(city_id):
             'id', 'state_id', 'created_at', 'updated_at'
         ]:  # Ignore these fields
             setattr(city, key, value)  # Update the city with the new value
-    storage.save()  # Save the changes to the storage
+    city.save()  # Save the changes to the storage
     return jsonify(city.to_dict())  # Return the updated city with status 200
@@ -0,0 +1,72 @@
+#!/usr/bin/python3
+"""Strong ETags and conditional GET for the api/v1 views
+
+An object's ETag is derived from its class, id and updated_at, a list's
+from the request path and query string and storage.versions() of the
+classes it is built from, so neither needs the body to be serialized.
+A request whose If-None-Match holds the current ETag gets an empty 304.
+"""
+from functools import wraps
+import hashlib
+from flask import Response, g, jsonify, make_response, request
+from models import storage
+
+
+def make_etag(*parts):
+    """Return the strong ETag value of the string parts"""
+    return hashlib.md5("\0".join(parts).encode()).hexdigest()
+
+
+def class_versions(names):
+    """Return the storage.versions() of the class names, read once per
+    request so the ETag and the response cache key agree"""
+    read = g.setdefault("class_versions", {})
+    names = tuple(names)
+    if names not in read:
+        versions = storage.versions(names)
+        read[names] = tuple(versions[name] for name in names)
+    return read[names]
+
+
+def object_etag(obj):
+    """Return the ETag of obj, which changes whenever obj is saved"""
+    return make_etag(obj.__class__.__name__, obj.id,
+                     obj.updated_at.isoformat())
+
+
+def not_modified(etag):
+    """Return a 304 response if the client holds etag, None otherwise"""
+    if etag in request.if_none_match:
+        response = Response(status=304)
+        response.set_etag(etag)
+        return response
+    return None
+
+
+def object_response(obj):
+    """Return obj as JSON with its ETag, or 304 if the client has it"""
+    etag = object_etag(obj)
+    response = not_modified(etag)
+    if response is None:
+        response = jsonify(obj.to_dict())
+        response.set_etag(etag)
+    return response
+
+
+def conditional(*names):
+    """gives the GET view built from the class names a list ETag"""
+    def decorator(view):
+        """wraps view with the If-None-Match check"""
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            """returns 304 if the classes did not change, else the view"""
+            etag = make_etag(request.full_path, *class_versions(names))
+            response = not_modified(etag)
+            if response is not None:
+                return response
+            response = make_response(view(*args, **kwargs))
+            if response.status_code == 200:
+                response.set_etag(etag)
+            return response
+        return wrapper
+    return decorator
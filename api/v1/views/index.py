@@ -7,6 +7,8 @@ This module provides two endpoints:
 """
 
 from api.v1.views import app_views
+from api.v1.views.conditional import conditional
+from api.v1.views.cache import cache, cached
 from flask import jsonify
 from api.v1.views.index import *
 from models import storage
@@ -30,14 +32,24 @@ def get_status():
 
 
 @app_views.route('/stats', methods=['GET'], strict_slashes=False)
+@conditional("Amenity", "City", "Place", "Review", "State", "User")
+@cached("Amenity", "City", "Place", "Review", "State", "User")
 def get_stats():
     """Returns the number of each objects by type"""
+    # One batched count for all classes instead of one query per class
+    counts = storage.counts([Amenity, City, Place, Review, State, User])
     stats = {
-        "amenities": storage.count(Amenity),
-        "cities": storage.count(City),
-        "places": storage.count(Place),
-        "reviews": storage.count(Review),
-        "states": storage.count(State),
-        "users": storage.count(User)
+        "amenities": counts["Amenity"],
+        "cities": counts["City"],
+        "places": counts["Place"],
+        "reviews": counts["Review"],
+        "states": counts["State"],
+        "users": counts["User"]
     }
     return jsonify(stats)
+
+
+@app_views.route('/cache/stats', methods=['GET'], strict_slashes=False)
+def get_cache_stats():
+    """Returns the hit, miss and eviction counters of the response cache"""
+    return jsonify(cache.stats())
@@ -0,0 +1,305 @@
+#!/usr/bin/python3
+"""Request latency, storage call and serialization metrics
+
+Unless HBNB_API_METRICS is 0, every request is timed per route, the
+calls to the storage methods are counted and timed, and so is the time
+spent in to_dict() and in encoding JSON responses. `GET /api/v1/metrics`
+returns the totals in the Prometheus text format. A request sent with
+the header `X-Timing: 1` gets its own breakdown in a Server-Timing
+header; the parts of a streamed list sent after the headers, and the
+storage.close() of the request teardown, are only counted in the route
+and storage totals. With file storage the last snapshot load is
+reported as well.
+"""
+from bisect import bisect_left
+from functools import wraps
+from os import getenv
+import threading
+import time
+from flask import Response, g, has_app_context, request
+from flask.json.provider import DefaultJSONProvider
+from api.v1.views import app_views
+from models import storage
+from models.base_model import BaseModel
+
+# upper bounds in seconds of the request latency histogram buckets
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0,
+           2.5, 5.0, 10.0)
+# storage methods counted, those missing from the engine in use are skipped
+STORAGE_METHODS = ("all", "all_by", "stream", "get", "get_many", "new",
+                   "delete", "save", "reload", "close", "count", "counts",
+                   "versions", "search_places", "bulk_insert")
+
+
+class Metrics:
+    """thread safe counters of the requests, storage calls and encoding"""
+
+    def __init__(self, buckets=BUCKETS):
+        """creates empty counters with the latency buckets"""
+        self.buckets = buckets
+        # (route, method) -> [bucket counts..., +Inf count, sum of seconds]
+        self.routes = {}
+        # (route, method) -> [storage calls, storage seconds,
+        #                     serialization seconds]
+        self.route_costs = {}
+        # storage method -> [calls, seconds]
+        self.storage = {}
+        # "to_dict" or "json" -> [calls, seconds]
+        self.serialization = {}
+        self.__lock = threading.Lock()
+        self.__local = threading.local()
+
+    def depth(self):
+        """returns how many storage calls the thread is inside of"""
+        return getattr(self.__local, "depth", 0)
+
+    def timed_storage(self, name, method):
+        """wraps the bound storage method to count and time its calls
+
+        A call made by another storage method is part of the outer call.
+        """
+        @wraps(method)
+        def wrapper(*args, **kwargs):
+            """calls method, recording its time if outermost"""
+            depth = self.depth()
+            self.__local.depth = depth + 1
+            start = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                self.__local.depth = depth
+                if not depth:
+                    self.record(self.storage, "storage", name,
+                                time.perf_counter() - start)
+        return wrapper
+
+    def timed_serialization(self, kind, function):
+        """wraps function to count and time it as serialization
+
+        Calls inside storage methods (e.g. save()) are left out.
+        """
+        @wraps(function)
+        def wrapper(*args, **kwargs):
+            """calls function, recording its time"""
+            if self.depth():
+                return function(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                self.record(self.serialization, "serialization", kind,
+                            time.perf_counter() - start)
+        return wrapper
+
+    def record(self, totals, part, name, seconds):
+        """adds a call of seconds to totals and to the current request"""
+        with self.__lock:
+            counter = totals.setdefault(name, [0, 0.0])
+            counter[0] += 1
+            counter[1] += seconds
+        if has_app_context() and "metrics" in g:
+            counter = g.metrics.setdefault((part, name), [0, 0.0])
+            counter[0] += 1
+            counter[1] += seconds
+
+    def observe(self, route, method, seconds, parts):
+        """adds a request of seconds and its storage and serialization
+        parts to the route totals"""
+        key = (route, method)
+        storage_calls = storage_seconds = serialization = 0
+        for (part, name), (calls, spent) in parts.items():
+            if part == "storage":
+                storage_calls += calls
+                storage_seconds += spent
+            else:
+                serialization += spent
+        with self.__lock:
+            counts = self.routes.get(key)
+            if counts is None:
+                counts = self.routes[key] = [0] * (len(self.buckets) + 1) \
+                    + [0.0]
+            counts[bisect_left(self.buckets, seconds)] += 1
+            counts[-1] += seconds
+            costs = self.route_costs.setdefault(key, [0, 0.0, 0.0])
+            costs[0] += storage_calls
+            costs[1] += storage_seconds
+            costs[2] += serialization
+
+    def reset(self):
+        """clears every counter"""
+        with self.__lock:
+            for totals in (self.routes, self.route_costs, self.storage,
+                           self.serialization):
+                totals.clear()
+
+    def exposition(self):
+        """returns the counters in the Prometheus text format"""
+        lines = []
+
+        def metric(name, kind, help):
+            """starts the metric name"""
+            lines.append("# HELP {} {}".format(name, help))
+            lines.append("# TYPE {} {}".format(name, kind))
+
+        with self.__lock:
+            routes = {key: list(counts)
+                      for key, counts in self.routes.items()}
+            costs = {key: list(value)
+                     for key, value in self.route_costs.items()}
+            calls = {name: list(value)
+                     for name, value in self.storage.items()}
+            encoding = {name: list(value)
+                        for name, value in self.serialization.items()}
+        metric("hbnb_request_duration_seconds", "histogram",
+               "Request latency by route")
+        for (route, method), counts in sorted(routes.items()):
+            labels = 'route="{}",method="{}"'.format(route, method)
+            total = 0
+            for bound, count in zip(self.buckets + ("+Inf",), counts):
+                total += count
+                lines.append('hbnb_request_duration_seconds_bucket'
+                             '{{{},le="{}"}} {}'.format(labels, bound, total))
+            lines.append("hbnb_request_duration_seconds_sum{{{}}} {}".format(
+                labels, counts[-1]))
+            lines.append("hbnb_request_duration_seconds_count{{{}}} {}"
+                         .format(labels, total))
+        for index, (name, help) in enumerate((
+                ("hbnb_request_storage_calls_total",
+                 "Storage calls made by the requests of a route"),
+                ("hbnb_request_storage_seconds_total",
+                 "Seconds spent in storage by the requests of a route"),
+                ("hbnb_request_serialization_seconds_total",
+                 "Seconds spent serializing by the requests of a route"))):
+            metric(name, "counter", help)
+            for (route, method), value in sorted(costs.items()):
+                lines.append('{}{{route="{}",method="{}"}} {}'.format(
+                    name, route, method, value[index]))
+        for prefix, label, totals, help in (
+                ("hbnb_storage", "method", calls, "storage method"),
+                ("hbnb_serialization", "kind", encoding,
+                 "serialization step")):
+            metric(prefix + "_calls_total", "counter",
+                   "Calls of each " + help)
+            for name, (count, seconds) in sorted(totals.items()):
+                lines.append('{}_calls_total{{{}="{}"}} {}'.format(
+                    prefix, label, name, count))
+            metric(prefix + "_seconds_total", "counter",
+                   "Seconds spent in each " + help)
+            for name, (count, seconds) in sorted(totals.items()):
+                lines.append('{}_seconds_total{{{}="{}"}} {}'.format(
+                    prefix, label, name, seconds))
+        return "\n".join(lines) + "\n"
+
+
+def pool_exposition():
+    """returns the connection pool gauges of DBStorage, if in use"""
+    if not hasattr(storage, "pool_stats"):
+        return ""
+    lines = []
+    for name, value in storage.pool_stats().items():
+        if isinstance(value, (int, float)):
+            lines.append("# TYPE hbnb_db_pool_{} gauge".format(name))
+            lines.append("hbnb_db_pool_{} {}".format(name, value))
+    return "\n".join(lines) + "\n"
+
+
+def reload_exposition():
+    """returns the gauges of the last FileStorage snapshot load, if any"""
+    if not hasattr(storage, "reload_stats"):
+        return ""
+    stats = storage.reload_stats()
+    lines = []
+    for name, field, help in (
+            ("hbnb_file_reload_objects", "objects",
+             "Objects read by the last snapshot load"),
+            ("hbnb_file_reload_seconds", "seconds",
+             "Seconds taken by the last snapshot load"),
+            ("hbnb_file_reload_max_rss_kb", "max_rss_kb",
+             "Process peak RSS after the last snapshot load")):
+        if stats.get(field) is not None:
+            lines.append("# HELP {} {}".format(name, help))
+            lines.append("# TYPE {} gauge".format(name))
+            lines.append("{} {}".format(name, stats[field]))
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def server_timing(parts, seconds):
+    """returns the Server-Timing header value of a request"""
+    entries = ['{};dur={:.3f};desc="{} calls"'.format(
+        "-".join(key), spent * 1000, calls)
+        for key, (calls, spent) in sorted(parts.items())]
+    entries.append("total;dur={:.3f}".format(seconds * 1000))
+    return ", ".join(entries)
+
+
+metrics = Metrics()
+
+
+class TimedJSONProvider(DefaultJSONProvider):
+    """JSON provider timing the encoding of the jsonify() responses"""
+    dumps = metrics.timed_serialization("json", DefaultJSONProvider.dumps)
+
+
+enabled = getenv("HBNB_API_METRICS", "1") != "0"
+if enabled:
+    for name in STORAGE_METHODS:
+        if hasattr(storage, name):
+            setattr(storage, name,
+                    metrics.timed_storage(name, getattr(storage, name)))
+    BaseModel.to_dict = metrics.timed_serialization("to_dict",
+                                                    BaseModel.to_dict)
+
+
+@app_views.record_once
+def use_timed_json(state):
+    """gives the app the timed JSON provider and the request recording"""
+    if enabled:
+        state.app.json = TimedJSONProvider(state.app)
+        # app context teardowns run last registered first, so this runs
+        # after the storage.close() app.py registers once the blueprint is
+        state.app.teardown_appcontext(stop_timer)
+
+
+@app_views.before_app_request
+def start_timer():
+    """starts timing the request"""
+    if enabled:
+        g.metrics = {}
+        g.metrics_start = time.perf_counter()
+
+
+@app_views.after_app_request
+def add_server_timing(response):
+    """adds the Server-Timing breakdown if the client asked for it"""
+    if enabled and "metrics" in g and \
+            request.headers.get("X-Timing") == "1":
+        response.headers["Server-Timing"] = server_timing(
+            g.metrics, time.perf_counter() - g.metrics_start)
+    return response
+
+
+@app_views.teardown_app_request
+def name_route(exception=None):
+    """keeps the route of the request for stop_timer()"""
+    if enabled and "metrics" in g:
+        rule = request.url_rule
+        g.metrics_route = (rule.rule if rule else "<unmatched>",
+                           request.method)
+
+
+def stop_timer(exception=None):
+    """records the request once a streamed body was sent and the storage
+    closed"""
+    if enabled and "metrics_route" in g:
+        route, method = g.pop("metrics_route")
+        metrics.observe(route, method,
+                        time.perf_counter() - g.metrics_start,
+                        g.pop("metrics"))
+
+
+@app_views.route('/metrics', methods=['GET'], strict_slashes=False)
+def get_metrics():
+    """Returns the metrics in the Prometheus text format"""
+    return Response(metrics.exposition() + pool_exposition() +
+                    reload_exposition(),
+                    mimetype="text/plain; version=0.0.4")
@@ -0,0 +1,142 @@
+#!/usr/bin/python3
+"""Keyset pagination and streaming for the collection views
+
+A page is requested with `?limit=<n>` and, for the following pages,
+`&cursor=<cursor>`. Objects are ordered by (created_at, id) and the
+X-Next-Cursor response header holds the cursor of the next page when
+there is one. Without either parameter the whole collection is streamed.
+A limit above HBNB_API_MAX_LIMIT (default 1000) is lowered to it.
+"""
+import base64
+from datetime import datetime
+import json
+from os import getenv
+from flask import Response, abort, jsonify, request, stream_with_context
+from models import storage
+from models.engine.json_backend import dumps
+
+DEFAULT_LIMIT = 100
+# int - largest page size served
+MAX_LIMIT = int(getenv("HBNB_API_MAX_LIMIT", 1000))
+# bytes of encoded JSON gathered before a chunk is sent
+STREAM_CHUNK = 1 << 16
+
+
+def encode_cursor(obj):
+    """Return the opaque cursor of the page that follows obj"""
+    raw = json.dumps([obj.created_at.isoformat(), obj.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor):
+    """Return the (created_at, id) tuple a cursor points after
+
+    Raises ValueError (or TypeError) on a cursor that does not hold a
+    naive timestamp and a string id, as encode_cursor() writes them.
+    """
+    created_at, id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    created_at = datetime.fromisoformat(created_at)
+    if created_at.tzinfo is not None or not isinstance(id, str):
+        raise ValueError("Invalid cursor")
+    return created_at, id
+
+
+def parse_page_args(limit, cursor):
+    """Return (limit, after) of the limit and cursor parameter strings
+
+    Raises ValueError with the error message on a limit that is not a
+    positive integer or on a cursor that was not returned by this API.
+    The limit is lowered to MAX_LIMIT.
+    """
+    if limit is None and cursor is None:
+        return None, None
+    try:
+        limit = DEFAULT_LIMIT if limit is None else int(limit)
+    except ValueError:
+        limit = 0
+    if limit < 1:
+        raise ValueError("Invalid limit")
+    limit = min(limit, MAX_LIMIT)
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(cursor)
+        except (ValueError, TypeError):
+            raise ValueError("Invalid cursor")
+    return limit, after
+
+
+def page_args():
+    """Return (limit, after) from the request, (None, None) if unpaged
+
+    Aborts with 400 on a limit that is not a positive integer or on a
+    cursor that was not returned by this API.
+    """
+    try:
+        return parse_page_args(request.args.get("limit"),
+                               request.args.get("cursor"))
+    except ValueError as error:
+        abort(400, description=str(error))
+
+
+def stream_response(objs):
+    """Return a response streaming the JSON list of objs
+
+    Each object is serialized as the client reads, so neither the list of
+    dictionaries nor the whole encoded body is held in memory. The request
+    context (and the storage session) stays open until the stream ends.
+    """
+    def generate():
+        """yields the encoded list in chunks of about STREAM_CHUNK bytes"""
+        chunk = ["["]
+        size = 0
+        sep = ""
+        for obj in objs:
+            part = sep + dumps(obj.to_dict())
+            sep = ","
+            chunk.append(part)
+            size += len(part)
+            if size >= STREAM_CHUNK:
+                yield "".join(chunk)
+                chunk = []
+                size = 0
+        chunk.append("]")
+        yield "".join(chunk)
+    return Response(stream_with_context(generate()),
+                    mimetype="application/json")
+
+
+def page_response(objs, limit):
+    """Return the JSON list of objs with the cursor of the next page
+
+    objs is expected to hold up to limit + 1 objects, the extra one only
+    telling that a next page exists. Without a limit the list is streamed.
+    """
+    if limit is None:
+        return stream_response(objs)
+    objs = list(objs)
+    next_cursor = None
+    if limit is not None and len(objs) > limit:
+        objs = objs[:limit]
+        next_cursor = encode_cursor(objs[-1])
+    response = jsonify([obj.to_dict() for obj in objs])
+    if next_cursor is not None:
+        response.headers["X-Next-Cursor"] = next_cursor
+    return response
+
+
+def list_response(cls, attr=None, value=None):
+    """Return the page requested of the objects of cls, those whose attr
+    equals value if attr is given
+
+    Without ?limit= or ?cursor= every object is streamed as storage reads
+    it (in batches with DBStorage), not loaded first.
+    """
+    limit, after = page_args()
+    if limit is None:
+        return stream_response(storage.stream(cls, attr, value))
+    if attr is None:
+        objs = storage.all(cls, limit=limit + 1, after=after)
+    else:
+        objs = storage.all_by(cls, attr, value, limit=limit + 1, after=after)
+    return page_response(objs.values(), limit)
@@ -3,16 +3,20 @@
 Handles all default RESTFul API actions for Place objects
 """
 
-from flask import Flask, jsonify, request
+from flask import jsonify, request
+from api.v1.views import app_views
+from api.v1.views.conditional import conditional, object_response
+from api.v1.views.pagination import list_response, page_args, \
+    page_response
 from models import storage
 from models.place import Place
 from models.city import City
 from models.user import User
 
-app = Flask(__name__)
 
-
-@app.route('/api/v1/cities/<city_id>/places', methods=['GET'])
+@app_views.route('/cities/<city_id>/places', methods=['GET'],
+                 strict_slashes=False)
+@conditional("City", "Place")
 def get_places_by_city(city_id):
     """Retrieve all Place objects of a specific City"""
     # Fetch the city object using the city_id
@@ -20,12 +24,12 @@ def get_places_by_city(city_id):
     if not city:
         # Return 404 error if city not found
         return jsonify({"error": "City not found"}), 404
-    # Return the list of places in the city
-    places = [place.to_dict() for place in city.places]
-    return jsonify(places)
+    # Return the page of places in the city requested with ?limit=&cursor=
+    return list_response(Place, "city_id", city_id)
 
 
-@app.route('/api/v1/places/<place_id>', methods=['GET'])
+@app_views.route('/places/<place_id>', methods=['GET'],
+                 strict_slashes=False)
 def get_place(place_id):
     """Retrieve a single Place object by place_id"""
     # Fetch the place object using the place_id
@@ -34,10 +38,11 @@ def get_place(place_id):
         # Return 404 error if place not found
         return jsonify({"error": "Place not found"}), 404
     # Return the place as a dictionary
-    return jsonify(place.to_dict())
+    return object_response(place)
 
 
-@app.route('/api/v1/places/<place_id>', methods=['DELETE'])
+@app_views.route('/places/<place_id>', methods=['DELETE'],
+                 strict_slashes=False)
 def delete_place(place_id):
     """Delete a Place object by place_id"""
     # Fetch the place object using the place_id
@@ -52,7 +57,8 @@ def delete_place(place_id):
     return jsonify({}), 200
 
 
-@app.route('/api/v1/cities/<city_id>/places', methods=['POST'])
+@app_views.route('/cities/<city_id>/places', methods=['POST'],
+                 strict_slashes=False)
 def create_place(city_id):
     """Create a new Place object for a specific City"""
     # Fetch the city object using the city_id
@@ -81,7 +87,8 @@ def create_place(city_id):
     return jsonify(place.to_dict()), 201
 
 
-@app.route('/api/v1/places/<place_id>', methods=['PUT'])
+@app_views.route('/places/<place_id>', methods=['PUT'],
+                 strict_slashes=False)
 def update_place(place_id):
     """Update an existing Place object by place_id"""
     # Fetch the place object using the place_id
@@ -94,76 +101,45 @@ def update_place(place_id):
     if not data:
         # Return 400 error if the body is not JSON
         return jsonify({"error": "Not a JSON"}), 400
-    # Update the place with valid data, ignoring some fields
+    # Update the place with valid data, ignoring some fields; amenities
+    # are linked through /places/<place_id>/amenities/<amenity_id>
     for key, value in data.items():
-        if key not in ['id', 'user_id', 'city_id', 'created_at', 'updated_at']:
+        if key not in ['id', 'user_id', 'city_id', 'amenity_ids',
+                       'created_at', 'updated_at']:
             setattr(place, key, value)
     # Save the updated place to storage
-    storage.save()
+    place.save()
     # Return the updated place with status code 200
     return jsonify(place.to_dict()), 200
 
 
-@app.route('/api/v1/places_search', methods=['POST'])
+@app_views.route('/places_search', methods=['POST'],
+                 strict_slashes=False)
 def places_search():
     """Search for places based on states, cities, and amenities"""
     # Step 1: Check if the body is valid JSON
     if not request.is_json:
         return jsonify({"error": "Not a JSON"}), 400
 
-    # Step 2: Parse the JSON body
+    # Step 2: Parse the JSON body, an object of lists of ids
     filters = request.get_json()
+    if not isinstance(filters, dict):
+        return jsonify({"error": "Not a JSON"}), 400
 
     states = filters.get("states", [])
     cities = filters.get("cities", [])
     amenities = filters.get("amenities", [])
-
-    # Step 3: Handle the case where there is no valid search data
-    places = storage.all(Place).values()
-
-    if not states and not cities and not amenities:
-        # No filters, return all places
-        return jsonify([place.to_dict() for place in places])
-
-    # Step 4: Apply the filter by states
-    if states:
-        state_places = []
-        for state_id in states:
-            state = storage.get(State, state_id)
-            if state:
-                for city in state.cities:
-                    # Add all places from the cities of the state
-                    state_places.extend(city.places)
-        places = set(state_places)  # Remove duplicates
-
-    # Step 5: Apply the filter by cities
-    if cities:
-        city_places = []
-        for city_id in cities:
-            city = storage.get(City, city_id)
-            if city:
-                city_places.extend(city.places)
-        # Combine with the state search results
-        places = set(places).union(set(city_places))
-
-    # Step 6: Apply the filter by amenities
-    if amenities:
-        amenity_filtered_places = []
-        for place in places:
-            if all(amenity in place.amenities for amenity in amenities):
-                amenity_filtered_places.append(place)
-        places = amenity_filtered_places
-
-    # Step 7: Return the final list of places
-    return jsonify([place.to_dict() for place in places])
-
-
-@app.teardown_appcontext
-def teardown(exc):
-    """Closes the storage session after each request"""
-    storage.close()
-
-
-if __name__ == "__main__":
-    # Start the Flask application
-    app.run(host='0.0.0.0', port=5000, threaded=True)
+    for name, ids in (("states", states), ("cities", cities),
+                      ("amenities", amenities)):
+        if not isinstance(ids, list) or \
+                not all(isinstance(id, str) for id in ids):
+            return jsonify({"error": "Invalid {}".format(name)}), 400
+
+    # Step 3: Let the storage intersect the precomputed id sets: places
+    # of the states and cities, then places having each amenity
+    limit, after = page_args()
+    places = storage.search_places(states, cities, amenities,
+                                   limit=limit and limit + 1, after=after)
+
+    # Step 4: Return the page of places requested with ?limit=&cursor=
+    return page_response(places, limit)
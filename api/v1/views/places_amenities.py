@@ -2,13 +2,24 @@
 """Handles all default RESTful API actions for Place-Amenity relationships"""
 from flask import jsonify, request
 from api.v1.views import app_views
-from models import storage
+from api.v1.views.conditional import conditional
+from api.v1.views.pagination import stream_response
+from models import storage, storage_t
 from models.place import Place
 from models.amenity import Amenity
 from flask import abort
 
 
+def is_linked(place, amenity):
+    """Tells if amenity is linked to place, by id with file storage, whose
+    compact store builds new objects on each access"""
+    if storage_t == 'db':
+        return amenity in place.amenities
+    return amenity.id in place.amenity_ids
+
+
 @app_views.route('/places/<place_id>/amenities', methods=['GET'])
+@conditional("Place", "Amenity")
 def get_amenities(place_id):
     """Retrieve all Amenity objects linked to a Place"""
     place = storage.get(Place, place_id)
@@ -16,7 +27,7 @@ def get_amenities(place_id):
         abort(404)
 
     amenities = place.amenities  # Depends on the relationship setup in models
-    return jsonify([amenity.to_dict() for amenity in amenities])
+    return stream_response(amenities)
 
 
 @app_views.route(
@@ -32,11 +43,16 @@ def delete_amenity_from_place(place_id, amenity_id):
     if not amenity:
         abort(404)
 
-    if amenity not in place.amenities:
+    if not is_linked(place, amenity):
         abort(404)
 
-    place.amenities.remove(amenity)
-    storage.save()  # Save changes to the storage
+    if storage_t == 'db':
+        place.amenities.remove(amenity)
+    else:  # File storage links through the indexed amenity_ids list
+        place.amenity_ids = [
+            id for id in place.amenity_ids if id != amenity.id
+        ]
+    place.save()  # Save changes to the storage
     return jsonify({}), 200
 
 
@@ -51,9 +67,12 @@ def link_amenity_to_place(place_id, amenity_id):
     if not amenity:
         abort(404)
 
-    if amenity in place.amenities:
+    if is_linked(place, amenity):
         return jsonify(amenity.to_dict()), 200
 
-    place.amenities.append(amenity)
-    storage.save()  # Save changes to the storage
+    if storage_t == 'db':
+        place.amenities.append(amenity)
+    else:  # File storage links through the indexed amenity_ids list
+        place.amenity_ids = place.amenity_ids + [amenity.id]
+    place.save()  # Save changes to the storage
     return jsonify(amenity.to_dict()), 201
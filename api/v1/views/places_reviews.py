@@ -3,16 +3,19 @@
 Handles all default RESTFul API actions for Review objects
 """
 
-from flask import Flask, jsonify, request
+from flask import jsonify, request
+from api.v1.views import app_views
+from api.v1.views.conditional import conditional, object_response
+from api.v1.views.pagination import list_response
 from models import storage
 from models.place import Place
 from models.user import User
 from models.review import Review
 
-app = Flask(__name__)
 
-
-@app.route('/api/v1/places/<place_id>/reviews', methods=['GET'])
+@app_views.route('/places/<place_id>/reviews', methods=['GET'],
+                 strict_slashes=False)
+@conditional("Place", "Review")
 def get_reviews_by_place(place_id):
     """Retrieve all Review objects for a specific Place"""
     # Fetch the place object using place_id
@@ -20,12 +23,12 @@ def get_reviews_by_place(place_id):
     if not place:
         # Return 404 error if place not found
         return jsonify({"error": "Place not found"}), 404
-    # Return the list of reviews associated with the place
-    reviews = [review.to_dict() for review in place.reviews]
-    return jsonify(reviews)
+    # Return the page of reviews of the place requested with ?limit=&cursor=
+    return list_response(Review, "place_id", place_id)
 
 
-@app.route('/api/v1/reviews/<review_id>', methods=['GET'])
+@app_views.route('/reviews/<review_id>', methods=['GET'],
+                 strict_slashes=False)
 def get_review(review_id):
     """Retrieve a single Review object by review_id"""
     # Fetch the review object using review_id
@@ -34,10 +37,11 @@ def get_review(review_id):
         # Return 404 error if review not found
         return jsonify({"error": "Review not found"}), 404
     # Return the review as a dictionary
-    return jsonify(review.to_dict())
+    return object_response(review)
 
 
-@app.route('/api/v1/reviews/<review_id>', methods=['DELETE'])
+@app_views.route('/reviews/<review_id>', methods=['DELETE'],
+                 strict_slashes=False)
 def delete_review(review_id):
     """Delete a Review object by review_id"""
     # Fetch the review object using review_id
@@ -52,7 +56,8 @@ def delete_review(review_id):
     return jsonify({}), 200
 
 
-@app.route('/api/v1/places/<place_id>/reviews', methods=['POST'])
+@app_views.route('/places/<place_id>/reviews', methods=['POST'],
+                 strict_slashes=False)
 def create_review(place_id):
     """Create a new Review object for a specific Place"""
     # Fetch the place object using place_id
@@ -81,7 +86,8 @@ def create_review(place_id):
     return jsonify(review.to_dict()), 201
 
 
-@app.route('/api/v1/reviews/<review_id>', methods=['PUT'])
+@app_views.route('/reviews/<review_id>', methods=['PUT'],
+                 strict_slashes=False)
 def update_review(review_id):
     """Update an existing Review object by review_id"""
     # Fetch the review object using review_id
@@ -101,17 +107,6 @@ def update_review(review_id):
         ]:
             setattr(review, key, value)
     # Save the updated review to storage
-    storage.save()
+    review.save()
     # Return the updated review with status code 200
     return jsonify(review.to_dict()), 200
-
-
-@app.teardown_appcontext
-def teardown(exc):
-    """Closes the storage session after each request"""
-    storage.close()
-
-
-if __name__ == "__main__":
-    # Start the Flask application
-    app.run(host='0.0.0.0', port=5000, threaded=True)
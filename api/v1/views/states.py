@@ -3,15 +3,20 @@
 
 from flask import jsonify, request
 from api.v1.views import app_views
+from api.v1.views.conditional import conditional, object_response
+from api.v1.views.cache import cached
+from api.v1.views.pagination import list_response
 from models import storage
 from models.state import State
 
 
 @app_views.route('/states', methods=['GET'], strict_slashes=False)
+@conditional("State")
+@cached("State")
 def get_states():
-    """Retrieve the list of all State objects"""
-    states = storage.all(State)  # Get all states
-    return jsonify([state.to_dict() for state in states.values()])
+    """Retrieve the list of all State objects, one page at a time"""
+    # Page requested with ?limit=&cursor=, all of them streamed without
+    return list_response(State)
 
 
 @app_views.route('/states/<state_id>', methods=['GET'], strict_slashes=False)
@@ -20,7 +25,7 @@ def get_state(state_id):
     state = storage.get(State, state_id)  # Retrieve the state by its ID
     if not state:
         return jsonify({"error": "Not found"}), 404
-    return jsonify(state.to_dict())
+    return object_response(state)
 
 
 @app_views.route(
@@ -62,5 +67,5 @@ def update_state(state_id):
     for key, value in data.items():
         if key not in ['id', 'created_at', 'updated_at']:  # Ignores the fields
             setattr(state, key, value)  # Update the state with the new value
-    storage.save()  # Save the changes to the storage
+    state.save()  # Save the changes to the storage
     return jsonify(state.to_dict())  # Return the updated state with status 200
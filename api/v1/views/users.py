@@ -14,19 +14,22 @@ The endpoints use Flask's `app_views` blueprint and the `storage` engine.
 
 from flask import jsonify, request
 from api.v1.views import app_views
+from api.v1.views.conditional import conditional, object_response
+from api.v1.views.pagination import list_response
 from models import storage
 from models.user import User
 
 
 @app_views.route('/users', methods=['GET'], strict_slashes=False)
+@conditional("User")
 def get_all_users():
     """Retrieve the list of all User objects.
 
     Returns:
-    Response: JSON list of all User objects with status 200.
+    Response: JSON list of the User objects of the page requested with
+    ?limit=&cursor= (all of them without), with status 200.
     """
-    users = storage.all(User)  # Get all users
-    return jsonify([user.to_dict() for user in users.values()])
+    return list_response(User)
 
 
 @app_views.route('/users/<user_id>', methods=['GET'], strict_slashes=False)
@@ -35,7 +38,7 @@ def get_user(user_id):
     user = storage.get(User, user_id)  # Retrieve the user by its ID
     if not user:
         return jsonify({"error": "Not found"}), 404
-    return jsonify(user.to_dict())
+    return object_response(user)
 
 
 @app_views.route('/users/<user_id>', methods=['DELETE'], strict_slashes=False)
@@ -81,5 +84,5 @@ def update_user(user_id):
             'id', 'email', 'created_at', 'updated_at'
         ]:  # Ignore specific fields
             setattr(user, key, value)  # Update the user with the new value
-    storage.save()  # Save the changes to storage
+    user.save()  # Save the changes to storage
     return jsonify(user.to_dict())  # Return the updated user with status 200
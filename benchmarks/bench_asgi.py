@@ -0,0 +1,166 @@
+#!/usr/bin/python3
+"""
+Compares the threaded Flask server with the ASGI entry point under load
+
+Seeds a SQLite database with states and cities, then starts the API as
+`python -m api.v1.app` (threaded=True) and as `uvicorn api.v1.asgi:app`
+on that database, and fires GET requests at /states/<id>/cities with a
+growing number of connections kept in flight at once. Each request gets
+an extra HBNB_BENCH_DELAY ms of database latency (default 20) so the
+servers wait on the database the way they would on a remote MySQL.
+Both use the same pool of HBNB_MYSQL_POOL_SIZE connections (default 50).
+Prints the requests per second and the median and 99th percentile
+latencies of each server. Needs uvicorn, aiosqlite and greenlet.
+
+Usage: ./benchmarks/bench_asgi.py [requests] [concurrency ...]
+"""
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+servers = {
+    "threaded": [sys.executable, "-m", "api.v1.app"],
+    "asgi": [sys.executable, "-m", "uvicorn", "api.v1.asgi:app",
+             "--port", "{port}", "--log-level", "warning",
+             "--backlog", "4096", "--loop", "asyncio"],
+}
+# sleeps in every SQLite statement, in the thread running it
+SITECUSTOMIZE = """
+import os, sqlite3, time
+delay = float(os.environ["HBNB_BENCH_DELAY"]) / 1000
+connect = sqlite3.connect
+def delayed(*args, **kwargs):
+    conn = connect(*args, **kwargs)
+    conn.set_trace_callback(lambda statement: time.sleep(delay))
+    return conn
+sqlite3.connect = sqlite3.dbapi2.connect = delayed
+"""
+
+
+def free_port():
+    """returns a TCP port nobody listens on"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def seed(env, states=20, cities=10):
+    """fills the database of env, returns the id of a state"""
+    code = ("from models import storage\n"
+            "from models.state import State\n"
+            "from models.city import City\n"
+            "for i in range({}):\n"
+            "    s = State(name='S%d' % i)\n"
+            "    storage.new(s)\n"
+            "    for j in range({}):\n"
+            "        storage.new(City(name='C%d' % j, state_id=s.id))\n"
+            "storage.save()\n"
+            "print(s.id)\n").format(states, cities)
+    out = subprocess.run([sys.executable, "-c", code], env=env, cwd=root,
+                         check=True, capture_output=True, text=True)
+    return out.stdout.split()[-1]
+
+
+async def fetch(port, path):
+    """returns the status and seconds of one GET on a new connection"""
+    start = time.perf_counter()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write("GET {} HTTP/1.1\r\nHost: localhost\r\n"
+                 "Connection: close\r\n\r\n".format(path).encode())
+    await writer.drain()
+    response = await reader.read()
+    writer.close()
+    return int(response.split(b" ", 2)[1]), time.perf_counter() - start
+
+
+async def load(port, path, requests, concurrency):
+    """runs requests GETs, concurrency at a time
+
+    Returns (requests per second, latencies, errors).
+    """
+    latencies = []
+    errors = 0
+    todo = iter(range(requests))
+
+    async def worker():
+        """sends requests until none are left"""
+        nonlocal errors
+        for _ in todo:
+            try:
+                status, seconds = await fetch(port, path)
+            except OSError:
+                status, seconds = 0, 0
+            if status != 200:
+                errors += 1
+            else:
+                latencies.append(seconds)
+    start = time.perf_counter()
+    await asyncio.gather(*[worker() for _ in range(concurrency)])
+    return requests / (time.perf_counter() - start), latencies, errors
+
+
+def wait_for(port, timeout=30):
+    """waits until something listens on port"""
+    end = time.monotonic() + timeout
+    while time.monotonic() < end:
+        try:
+            socket.create_connection(("127.0.0.1", port), 0.5).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("server on port {} did not start".format(port))
+
+
+def percentile(values, p):
+    """returns the p-th percentile of values, 0 if there are none"""
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p / 100))] \
+        if values else 0
+
+
+def main():
+    """prints the load table of both servers"""
+    requests = int(sys.argv[1]) if len(sys.argv) > 1 else 2000
+    levels = [int(n) for n in sys.argv[2:]] or [10, 100, 1000]
+    tmp = tempfile.mkdtemp()
+    db = os.path.join(tmp, "bench.db")
+    with open(os.path.join(tmp, "sitecustomize.py"), "w") as f:
+        f.write(SITECUSTOMIZE)
+    env = dict(os.environ, HBNB_TYPE_STORAGE="db",
+               HBNB_DB_URL="sqlite:///" + db,
+               HBNB_ASYNC_DB_URL="sqlite+aiosqlite:///" + db,
+               HBNB_API_CACHE_TTL="0", HBNB_API_HOST="127.0.0.1",
+               HBNB_MYSQL_POOL_SIZE=os.getenv("HBNB_MYSQL_POOL_SIZE", "50"),
+               HBNB_BENCH_DELAY=os.getenv("HBNB_BENCH_DELAY", "20"),
+               PYTHONPATH=os.pathsep.join([tmp, root]))
+    state_id = seed(env)
+    path = "/api/v1/states/{}/cities".format(state_id)
+    print("{:<10} {:>11} {:>9} {:>9} {:>9} {:>7}".format(
+        "server", "concurrency", "req/s", "p50 ms", "p99 ms", "errors"))
+    for name, command in servers.items():
+        port = free_port()
+        server = subprocess.Popen(
+            [arg.format(port=port) for arg in command], cwd=root,
+            env=dict(env, HBNB_API_PORT=str(port)),
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            wait_for(port)
+            for concurrency in levels:
+                rate, latencies, errors = asyncio.run(
+                    load(port, path, requests, concurrency))
+                print("{:<10} {:>11} {:>9.0f} {:>9.1f} {:>9.1f} {:>7}".format(
+                    name, concurrency, rate,
+                    percentile(latencies, 50) * 1000,
+                    percentile(latencies, 99) * 1000, errors))
+        finally:
+            server.terminate()
+            server.wait()
+
+
+if __name__ == "__main__":
+    main()
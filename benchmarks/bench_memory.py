@@ -0,0 +1,74 @@
+#!/usr/bin/python3
+"""
+Measures the memory FileStorage holds per object in each layout
+
+Fills FileStorage with reviews of a few places, then with places of a
+few cities, first as a dictionary of instances (the default) and then
+as the compact column store of HBNB_FILE_COMPACT=1, and prints the bytes
+traced by tracemalloc for the objects and their indexes.
+
+Usage: ./benchmarks/bench_memory.py [objects per class]
+"""
+import gc
+import os
+import sys
+import time
+import tracemalloc
+import uuid
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.engine.compact_store import CompactObjects  # noqa: E402
+from models.engine.file_storage import FileStorage  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+
+layouts = {"dict": dict, "compact": CompactObjects}
+parents = [str(uuid.uuid4()) for _ in range(100)]
+samples = {
+    # ids are built from JSON text on reload, so they are never shared
+    "Review": lambda i: Review(text="Great stay",
+                               place_id="".join(parents[i % 100]),
+                               user_id="".join(parents[i % 7])),
+    "Place": lambda i: Place(name="Loft", city_id="".join(parents[i % 100]),
+                             user_id="".join(parents[i % 7]),
+                             description="A nice loft", number_rooms=2,
+                             price_by_night=120, latitude=37.77,
+                             amenity_ids=["".join(parents[i % 3])]),
+}
+
+
+def measure(layout, make, count):
+    """returns the bytes held and seconds taken to store count objects"""
+    FileStorage._FileStorage__objects = layouts[layout]()
+    storage = FileStorage()
+    storage.all()
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    for i in range(count):
+        storage.new(make(i))
+    seconds = time.perf_counter() - start
+    gc.collect()
+    held = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    FileStorage._FileStorage__pending.clear()
+    return held, seconds
+
+
+def main():
+    """prints the memory table"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print("{} objects per class".format(count))
+    print("{:<10}{:<10}{:>14}{:>12}{:>14}".format(
+        "class", "layout", "MiB", "bytes/obj", "new()/s"))
+    for name, make in samples.items():
+        for layout in layouts:
+            held, seconds = measure(layout, make, count)
+            print("{:<10}{:<10}{:>14.1f}{:>12.0f}{:>14,.0f}".format(
+                name, layout, held / (1 << 20), held / count,
+                count / seconds))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/python3
+"""
+Benchmark suite of the storage engines and the hot API routes
+
+For each engine (FileStorage, and DBStorage on a SQLite file standing in
+for MySQL) and each scale, a synthetic dataset is generated with the
+fan-out of a real one: per state 10 cities, per city 3 places, per place
+3 reviews, plus a user per 50 objects and 50 amenities. It is loaded with
+bulk_insert() and the suite times save(), reload() (from scratch, and
+with nothing changed on disk), all(cls), get(), count(), the
+relationship getters (get() then state.cities, city.places or
+place.reviews) and the API routes through the Flask test client, with
+the response cache off.
+
+Every engine and scale runs in a fresh process in a temporary directory,
+so file.json of the repository is never touched. The results are printed
+(or written to --output) as one JSON document, with the environment
+they were measured in, so runs can be compared over time.
+
+Usage: ./benchmarks/bench_suite.py [--engines file,db]
+                                   [--scales 1000,10000,100000,1000000]
+                                   [--repeat N] [--output FILE]
+"""
+import argparse
+from datetime import datetime, timedelta
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+root = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+# objects per state: the state, its cities, places and reviews
+CITIES, PLACES, REVIEWS = 10, 3, 3
+PER_STATE = 1 + CITIES * (1 + PLACES * (1 + REVIEWS))
+AMENITIES = 50
+# objects per user
+USER_EVERY = 50
+
+
+def dataset(scale, seed=0):
+    """returns class name -> rows of a dataset of about scale objects"""
+    rng = random.Random(seed)
+    start = datetime(2024, 1, 1)
+    made = [0]
+
+    def row(**values):
+        """returns a to_dict() style row with a new id and timestamps"""
+        made[0] += 1
+        stamp = (start + timedelta(seconds=made[0])).isoformat(
+            timespec="microseconds")
+        values.update(id=str(uuid.UUID(int=rng.getrandbits(128))),
+                      created_at=stamp, updated_at=stamp)
+        return values
+
+    rows = {"State": [], "City": [], "User": [], "Amenity": [],
+            "Place": [], "Review": []}
+    rows["Amenity"] = [row(name="Amenity {}".format(i))
+                       for i in range(AMENITIES)]
+    rows["User"] = [row(email="user{}@hbnb.io".format(i), password="pwd",
+                        first_name="First", last_name="Last")
+                    for i in range(max(1, scale // USER_EVERY))]
+    for s in range(max(1, scale // PER_STATE)):
+        state = row(name="State {}".format(s))
+        rows["State"].append(state)
+        for c in range(CITIES):
+            city = row(name="City {}".format(c), state_id=state["id"])
+            rows["City"].append(city)
+            for p in range(PLACES):
+                place = row(name="Place {}".format(p), city_id=city["id"],
+                            user_id=rng.choice(rows["User"])["id"],
+                            description="A nice place", number_rooms=2,
+                            number_bathrooms=1, max_guest=4,
+                            price_by_night=100, latitude=37.7,
+                            longitude=-122.4,
+                            amenity_ids=[one["id"] for one in
+                                         rng.sample(rows["Amenity"], 3)])
+                rows["Place"].append(place)
+                rows["Review"].extend(
+                    row(text="Great stay", place_id=place["id"],
+                        user_id=rng.choice(rows["User"])["id"])
+                    for _ in range(REVIEWS))
+    return rows
+
+
+def timed(function, repeat=1):
+    """returns the timings in seconds of repeat calls of function"""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return times
+
+
+def summary(times, ops=1):
+    """returns the statistics of times, each for ops operations"""
+    ordered = sorted(times)
+    return {"runs": len(times), "ops": ops,
+            "total_s": sum(times),
+            "mean_s": sum(times) / len(times),
+            "min_s": ordered[0],
+            "p50_s": ordered[len(ordered) // 2],
+            "p99_s": ordered[min(len(ordered) - 1,
+                                 int(len(ordered) * 0.99))],
+            "per_op_us": sum(times) / len(times) / ops * 1e6}
+
+
+def run(engine, scale, repeat):
+    """measures engine at scale in this process, returns the results"""
+    import models
+    from models import storage
+    from models.amenity import Amenity
+    from models.city import City
+    from models.place import Place
+    from models.review import Review
+    from models.state import State
+    from models.user import User
+    from api.v1.app import app
+
+    classes = {"State": State, "City": City, "User": User,
+               "Amenity": Amenity, "Place": Place, "Review": Review}
+    results = {}
+    rows = dataset(scale)
+    total = sum(len(objs) for objs in rows.values())
+
+    def insert():
+        """loads the dataset, parents first"""
+        for name, cls in classes.items():
+            storage.bulk_insert(cls, rows[name])
+    results["bulk_insert"] = summary(timed(insert), total)
+    results["save"] = summary(timed(storage.save), total)
+    storage.close()
+
+    def reload():
+        """reloads everything, FileStorage starting from an empty store"""
+        if models.storage_t != "db":
+            objects = type(storage)._FileStorage__objects
+            type(storage)._FileStorage__objects = type(objects)()
+        storage.reload()
+    results["reload"] = summary(timed(reload, repeat), total)
+    if hasattr(storage, "reload_stats"):
+        # objects, seconds and process peak RSS of the last cold reload
+        results["reload"]["last"] = storage.reload_stats()
+    results["reload.unchanged"] = summary(timed(storage.reload, repeat),
+                                          total)
+    for name, cls in classes.items():
+        count = len(rows[name])
+        results["all." + name] = summary(
+            timed(lambda: storage.all(cls), repeat), count)
+    rng = random.Random(1)
+    picks = [(classes[name], rng.choice(rows[name])["id"])
+             for name in rng.choices(list(classes), k=1000)]
+    results["get"] = summary(
+        timed(lambda: [storage.get(cls, id) for cls, id in picks],
+              repeat), len(picks))
+    results["count"] = summary(timed(storage.count, repeat))
+    results["count.Place"] = summary(
+        timed(lambda: storage.count(Place), repeat))
+
+    getters = {"State.cities": ("State", "cities"),
+               "City.places": ("City", "places"),
+               "Place.reviews": ("Place", "reviews")}
+    for label, (name, attr) in getters.items():
+        ids = [one["id"] for one in
+               rng.sample(rows[name], min(100, len(rows[name])))]
+
+        def walk():
+            """gets every sampled object and reads its relationship"""
+            for id in ids:
+                len(getattr(storage.get(classes[name], id), attr))
+            if models.storage_t == "db":
+                storage.close()
+        results["getter." + label] = summary(timed(walk, repeat),
+                                             len(ids))
+
+    state = rows["State"][0]
+    city = rows["City"][0]
+    place = rows["Place"][0]
+    routes = {
+        "GET /stats": ("get", "/api/v1/stats", None),
+        "GET /states?limit=100": ("get", "/api/v1/states?limit=100", None),
+        "GET /states/<id>": ("get", "/api/v1/states/" + state["id"],
+                             None),
+        "GET /states/<id>/cities": (
+            "get", "/api/v1/states/{}/cities".format(state["id"]), None),
+        "GET /cities/<id>/places": (
+            "get", "/api/v1/cities/{}/places".format(city["id"]), None),
+        "GET /places/<id>/reviews": (
+            "get", "/api/v1/places/{}/reviews".format(place["id"]), None),
+        "POST /places_search": ("post", "/api/v1/places_search",
+                                {"states": [state["id"]]}),
+    }
+    client = app.test_client()
+    for label, (method, url, body) in routes.items():
+        def request():
+            """sends the request and reads the whole response"""
+            response = getattr(client, method)(url, json=body)
+            response.get_data()
+            if response.status_code != 200:
+                raise RuntimeError("{}: {}".format(label,
+                                                   response.status_code))
+        request()
+        results["api." + label] = summary(timed(request, repeat * 10))
+    return {"engine": engine, "scale": scale, "objects": total,
+            "results": results}
+
+
+def child(engine, scale, repeat):
+    """runs one engine and scale in a fresh process, returns its results"""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(os.environ, PYTHONPATH=root, HBNB_API_CACHE_TTL="0",
+                   HBNB_API_METRICS="0")
+        env.pop("HBNB_ENV", None)
+        if engine == "db":
+            env.update(HBNB_TYPE_STORAGE="db",
+                       HBNB_DB_URL="sqlite:///" + os.path.join(
+                           tmp, "bench.db"))
+        else:
+            env["HBNB_TYPE_STORAGE"] = "file"
+        out = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child",
+             engine, str(scale), str(repeat)],
+            cwd=tmp, env=env, check=True, capture_output=True, text=True)
+        return json.loads(out.stdout)
+
+
+def main():
+    """runs the suite and prints or writes the JSON results"""
+    parser = argparse.ArgumentParser(description="Benchmark suite")
+    parser.add_argument("--engines", default="file,db")
+    parser.add_argument("--scales", default="1000,10000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output")
+    parser.add_argument("--child", nargs=3, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        engine, scale, repeat = args.child
+        print(json.dumps(run(engine, int(scale), int(repeat))))
+        return
+    sys.path.insert(0, root)
+    from models.engine.json_backend import backend
+    try:
+        commit = subprocess.run(["git", "rev-parse", "HEAD"], cwd=root,
+                                capture_output=True, text=True).stdout
+    except OSError:
+        commit = ""
+    report = {"meta": {"date": datetime.utcnow().isoformat(),
+                       "commit": commit.strip() or None,
+                       "python": platform.python_version(),
+                       "platform": platform.platform(),
+                       "json_backend": backend,
+                       "repeat": args.repeat},
+              "runs": []}
+    for engine in args.engines.split(","):
+        for scale in args.scales.split(","):
+            print("{} {}...".format(engine, scale), file=sys.stderr)
+            report["runs"].append(child(engine, int(scale), args.repeat))
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+#!/usr/bin/python3
+"""
+Measures serialization throughput, in objects per second, for each model
+
+For every class it times to_dict(), then to_dict() followed by encoding
+with the JSON backend in use (orjson, ujson or json). The default of
+100000 objects per class is about the size of a store FileStorage.save()
+serializes whole.
+
+Usage: ./benchmarks/bench_to_dict.py [objects per class]
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from models.amenity import Amenity  # noqa: E402
+from models.city import City  # noqa: E402
+from models.engine.json_backend import backend, dumps  # noqa: E402
+from models.place import Place  # noqa: E402
+from models.review import Review  # noqa: E402
+from models.state import State  # noqa: E402
+from models.user import User  # noqa: E402
+
+samples = {
+    "Amenity": lambda: Amenity(name="Wifi"),
+    "City": lambda: City(name="San Francisco", state_id="state-id"),
+    "Place": lambda: Place(name="Loft", city_id="city-id",
+                           user_id="user-id", description="A nice loft",
+                           number_rooms=2, number_bathrooms=1, max_guest=4,
+                           price_by_night=120, latitude=37.77,
+                           longitude=-122.41),
+    "Review": lambda: Review(text="Great stay", place_id="place-id",
+                             user_id="user-id"),
+    "State": lambda: State(name="California"),
+    "User": lambda: User(email="a@b.c", first_name="Ada",
+                         last_name="Lovelace"),
+}
+
+
+def rate(objs, func):
+    """returns how many objects per second func processes"""
+    start = time.perf_counter()
+    for obj in objs:
+        func(obj)
+    return len(objs) / (time.perf_counter() - start)
+
+
+def main():
+    """prints the throughput table"""
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 100000
+    print("JSON backend: {}, {} objects per class".format(backend, count))
+    print("{:<10}{:>16}{:>20}".format("class", "to_dict/s",
+                                      "to_dict+dumps/s"))
+    for name, make in samples.items():
+        objs = [make() for _ in range(count)]
+        first = rate(objs, lambda obj: obj.to_dict())
+        encode = rate(objs, lambda obj: dumps(obj.to_dict()))
+        print("{:<10}{:>16,.0f}{:>20,.0f}".format(name, first, encode))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,176 @@
+#!/usr/bin/python3
+"""
+Bulk import and export of objects between JSON Lines or CSV files and the
+storage engine selected by HBNB_TYPE_STORAGE
+
+Usage: ./bulk.py import [--format jsonl|csv] [--class NAME] [--chunk N] FILE
+       ./bulk.py export [--format jsonl|csv] [--class NAME] FILE
+
+FILE may be - for stdin/stdout. Each JSON line is the to_dict() of one
+object; a CSV file has a header row, one object per row and its class in
+a __class__ column or given with --class. Imports are read in chunks of
+--chunk rows handed to storage.bulk_insert(): the database commits each
+chunk with bulk inserts, the file storage writes a single snapshot at
+the end. The rows per second are reported on stderr.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+import models
+from models import storage
+from models.amenity import Amenity
+from models.city import City
+from models.engine.json_backend import dumps
+from models.place import Place
+from models.review import Review
+from models.state import State
+from models.user import User
+
+# classes in an order where parents come before the objects they own
+classes = {"State": State, "City": City, "User": User, "Amenity": Amenity,
+           "Place": Place, "Review": Review}
+
+
+def field_type(cls, attr):
+    """returns the type of the values of attr in cls, None if unknown"""
+    value = getattr(cls, attr, None)
+    columns = getattr(getattr(value, "property", None), "columns", None)
+    if columns:
+        try:
+            return columns[0].type.python_type
+        except NotImplementedError:
+            return None
+    if value is None or isinstance(value, property):
+        return None
+    return type(value)
+
+
+def from_csv(cls, row):
+    """returns the CSV row of cls with its values converted back"""
+    values = {}
+    for attr, value in row.items():
+        if attr is None or value is None or value == "":
+            continue
+        kind = field_type(cls, attr)
+        if kind in (int, float):
+            value = kind(value)
+        elif kind in (list, dict) or attr == "amenity_ids":
+            value = json.loads(value)
+        values[attr] = value
+    return values
+
+
+def to_csv(row):
+    """returns the values of row as CSV cells, None as an empty one"""
+    return {attr: "" if value is None else
+            value if isinstance(value, str) else dumps(value)
+            for attr, value in row.items()}
+
+
+def read_rows(stream, fmt, name=None):
+    """yields (class name, row) for each object in stream"""
+    if fmt == "csv":
+        for row in csv.DictReader(stream):
+            cls_name = name or row.pop("__class__", None)
+            yield cls_name, from_csv(classes[cls_name], row)
+        return
+    for line in stream:
+        if line.strip():
+            row = json.loads(line)
+            yield name or row["__class__"], row
+
+
+def import_rows(stream, fmt="jsonl", name=None, chunk=1000):
+    """loads the objects of stream into storage, returns how many"""
+    total = 0
+    rows = {}
+
+    def flush():
+        """inserts the staged rows, parents first"""
+        for cls_name in classes:
+            if rows.get(cls_name):
+                storage.bulk_insert(classes[cls_name], rows[cls_name])
+        rows.clear()
+        if models.storage_t == "db":
+            storage.save()
+
+    staged = 0
+    for cls_name, row in read_rows(stream, fmt, name):
+        if cls_name not in classes:
+            raise ValueError("unknown class: {}".format(cls_name))
+        rows.setdefault(cls_name, []).append(row)
+        staged += 1
+        if staged >= chunk:
+            total += staged
+            staged = 0
+            flush()
+    total += staged
+    flush()
+    if models.storage_t != "db":
+        storage.save()
+    return total
+
+
+def export_rows(stream, fmt="jsonl", name=None):
+    """writes the objects in storage to stream, returns how many"""
+    total = 0
+    writer = None
+    for cls_name in ([name] if name else classes):
+        cls = classes[cls_name]
+        if models.storage_t == "db" and cls is Place:
+            objs = storage.all(cls, load=["amenities"]).values()
+        else:
+            objs = storage.all(cls).values()
+        for obj in objs:
+            row = obj.to_dict()
+            if models.storage_t == "db" and cls is Place:
+                row.pop("amenities", None)
+                row["amenity_ids"] = [one.id for one in obj.amenities]
+            if fmt == "csv":
+                if writer is None:
+                    header = ["__class__"] + [
+                        attr for attr in row if attr != "__class__"]
+                    if "amenity_ids" in vars(cls) and \
+                            "amenity_ids" not in header:
+                        header.append("amenity_ids")
+                    writer = csv.DictWriter(stream, header,
+                                            extrasaction="ignore")
+                    writer.writeheader()
+                writer.writerow(to_csv(row))
+            else:
+                stream.write(dumps(row) + "\n")
+            total += 1
+    return total
+
+
+def main(argv=None):
+    """runs the import or export command of argv"""
+    parser = argparse.ArgumentParser(description="Bulk import/export")
+    parser.add_argument("command", choices=("import", "export"))
+    parser.add_argument("file")
+    parser.add_argument("--format", choices=("jsonl", "csv"))
+    parser.add_argument("--class", dest="name", choices=sorted(classes))
+    parser.add_argument("--chunk", type=int, default=1000)
+    args = parser.parse_args(argv)
+    fmt = args.format or ("csv" if args.file.endswith(".csv") else "jsonl")
+    if fmt == "csv" and args.command == "export" and not args.name:
+        parser.error("a CSV export holds a single class, use --class")
+    start = time.perf_counter()
+    if args.command == "import":
+        with (sys.stdin if args.file == "-" else
+              open(args.file, newline="")) as stream:
+            total = import_rows(stream, fmt, args.name, args.chunk)
+    else:
+        with (sys.stdout if args.file == "-" else
+              open(args.file, "w", newline="")) as stream:
+            total = export_rows(stream, fmt, args.name)
+    seconds = time.perf_counter() - start
+    print("{}ed {} rows in {:.2f}s ({:,.0f} rows/s)".format(
+        args.command, total, seconds, total / seconds if seconds else 0),
+        file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
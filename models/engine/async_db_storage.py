@@ -0,0 +1,119 @@
+#!/usr/bin/python3
+"""
+Contains the class AsyncDBStorage, the read side of DBStorage on an
+asyncio SQLAlchemy engine, used by the ASGI entry point api/v1/asgi.py
+"""
+
+from models.base_model import Base
+from models.engine.db_storage import DBStorage, classes
+from os import getenv
+from sqlalchemy import select
+from asyncio import current_task
+from sqlalchemy.ext.asyncio import async_scoped_session, async_sessionmaker
+from sqlalchemy.ext.asyncio import create_async_engine
+
+
+class AsyncDBStorage:
+    """reads the MySQL database without blocking the event loop
+
+    Each asyncio task (each request) gets its own session, released by
+    close(), so any number of requests can use the storage at once; they
+    only wait for a pooled connection, never hold a thread. The database
+    url defaults to the HBNB_MYSQL_* database through aiomysql,
+    HBNB_ASYNC_DB_URL overrides it (e.g. sqlite+aiosqlite:///hbnb.db).
+    Writes go through DBStorage.
+    """
+    __engine = None
+    __session = None
+
+    def __init__(self):
+        """Instantiate an AsyncDBStorage object"""
+        url = getenv('HBNB_ASYNC_DB_URL') or 'mysql+aiomysql://{}:{}@{}/{}'.\
+            format(getenv('HBNB_MYSQL_USER'), getenv('HBNB_MYSQL_PWD'),
+                   getenv('HBNB_MYSQL_HOST'), getenv('HBNB_MYSQL_DB'))
+        # same pool sizing as DBStorage
+        self.__engine = create_async_engine(
+            url,
+            pool_size=int(getenv('HBNB_MYSQL_POOL_SIZE', 5)),
+            max_overflow=int(getenv('HBNB_MYSQL_MAX_OVERFLOW', 10)),
+            pool_timeout=float(getenv('HBNB_MYSQL_POOL_TIMEOUT', 30)),
+            pool_recycle=int(getenv('HBNB_MYSQL_POOL_RECYCLE', 3600)),
+            pool_pre_ping=getenv('HBNB_MYSQL_POOL_PRE_PING', '1') == '1')
+
+    async def reload(self):
+        """creates the missing tables and the session factory"""
+        async with self.__engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        sess_factory = async_sessionmaker(self.__engine,
+                                          expire_on_commit=False)
+        self.__session = async_scoped_session(sess_factory,
+                                              scopefunc=current_task)
+
+    async def close(self):
+        """releases the session of the current task"""
+        await self.__session.remove()
+
+    async def dispose(self):
+        """closes every pooled connection"""
+        await self.__engine.dispose()
+
+    async def _scalars(self, stmt):
+        """returns the list of objects stmt selects"""
+        return (await self.__session.scalars(stmt)).all()
+
+    async def all(self, cls, limit=None, after=None):
+        """Return key -> object of cls, one page with limit and after
+
+        Pages are the keyset pages of DBStorage.all().
+        """
+        if isinstance(cls, str):
+            cls = classes[cls]
+        stmt = DBStorage._page(select(cls), cls, limit, after)
+        return {cls.__name__ + '.' + obj.id: obj
+                for obj in await self._scalars(stmt)}
+
+    async def all_by(self, cls, attr, value, limit=None, after=None):
+        """Return the objects of cls whose column attr equals value"""
+        if isinstance(cls, str):
+            cls = classes[cls]
+        stmt = select(cls).where(getattr(cls, attr) == value)
+        stmt = DBStorage._page(stmt, cls, limit, after)
+        return {cls.__name__ + '.' + obj.id: obj
+                for obj in await self._scalars(stmt)}
+
+    async def get(self, cls, id):
+        """Retrieve one object based on class and ID"""
+        if cls and id:
+            if isinstance(cls, str):
+                cls = classes[cls]
+            return await self.__session.get(cls, id)
+        return None
+
+    async def get_many(self, cls, ids):
+        """Retrieve the objects of cls with the ids in one IN query"""
+        if isinstance(cls, str):
+            cls = classes[cls]
+        ids = {id for id in ids if isinstance(id, str)}
+        if not ids:
+            return {}
+        return {obj.id: obj for obj in
+                await self._scalars(select(cls).where(cls.id.in_(ids)))}
+
+    async def counts(self, clss=None):
+        """Count the objects of several classes in a single query"""
+        return {name: stats[0]
+                for name, stats in (await self._table_stats(clss)).items()}
+
+    async def versions(self, clss=None):
+        """Return class name -> version, the same as DBStorage.versions()"""
+        return {name: "{}.{}".format(n, latest and latest.isoformat())
+                for name, (n, latest) in
+                (await self._table_stats(clss)).items()}
+
+    async def _table_stats(self, clss=None):
+        """Return class name -> (row count, latest updated_at) of clss"""
+        names = [c if isinstance(c, str) else c.__name__
+                 for c in (clss or classes)]
+        rows = await self.__session.execute(DBStorage._stats_statement(names))
+        stats = {name: (n, latest) for name, n, latest in rows}
+        return {name: stats[name] for name in names}
@@ -0,0 +1,204 @@
+#!/usr/bin/python3
+"""
+Contains the compact, column oriented object store FileStorage can use
+in place of a dictionary of model instances (HBNB_FILE_COMPACT=1)
+"""
+
+from array import array
+from collections.abc import Mapping, MutableMapping
+from datetime import datetime, timedelta
+import sys
+
+# naive datetimes are stored as microseconds since EPOCH
+EPOCH = datetime(1970, 1, 1)
+MICROSECOND = timedelta(microseconds=1)
+# timestamp slot of a row whose timestamp is not a naive datetime
+NO_TIME = -1 << 63
+# column slot of a row that does not have the attribute
+MISSING = type("Missing", (), {"__repr__": lambda self: "MISSING"})()
+
+
+def is_reference(attr):
+    """tells if the string values of attr are ids worth interning"""
+    return attr == "id" or attr.endswith("_id") or attr.endswith("_ids")
+
+
+class ColumnTable(Mapping):
+    """the objects of one class, one column per attribute
+
+    Ids and foreign keys are interned so every reference to an object
+    shares one string, created_at and updated_at are packed into arrays
+    of 64 bit integers and the other attributes each get a list with a
+    slot per row. Rows are read as <class name>.id -> obj like the
+    FileStorage dictionary; every access materializes a new instance, so
+    changes to it are only stored by putting it back.
+    """
+
+    def __init__(self, cls):
+        """creates an empty table for the instances of cls"""
+        self.cls = cls
+        self.prefix = cls.__name__ + "."
+        # list - id of each row, None for a free row
+        self.ids = []
+        # dictionary - id -> row
+        self.rows = {}
+        # list - free rows to reuse
+        self.free = []
+        self.created_at = array("q")
+        self.updated_at = array("q")
+        # dictionary - attribute -> list of values, MISSING if unset
+        self.columns = {}
+
+    def _id(self, key):
+        """returns the id of key, KeyError if key is not of this class"""
+        if not key.startswith(self.prefix):
+            raise KeyError(key)
+        return key[len(self.prefix):]
+
+    @staticmethod
+    def _pack_time(value):
+        """returns value in microseconds, NO_TIME if it can't be packed"""
+        if type(value) is datetime and value.tzinfo is None:
+            return (value - EPOCH) // MICROSECOND
+        return NO_TIME
+
+    @staticmethod
+    def _pack(attr, value):
+        """returns the form value is stored in"""
+        if is_reference(attr):
+            if isinstance(value, str):
+                return sys.intern(value)
+            if isinstance(value, list):
+                return tuple(sys.intern(one) if isinstance(one, str)
+                             else one for one in value)
+        elif isinstance(value, list):
+            return tuple(value)
+        return value
+
+    def put(self, key, obj):
+        """stores the attributes of obj in the row of key"""
+        id = sys.intern(self._id(key))
+        row = self.rows.get(id)
+        if row is None:
+            if self.free:
+                row = self.free.pop()
+                self.ids[row] = id
+            else:
+                row = len(self.ids)
+                self.ids.append(id)
+                self.created_at.append(NO_TIME)
+                self.updated_at.append(NO_TIME)
+                for column in self.columns.values():
+                    column.append(MISSING)
+            self.rows[id] = row
+        else:
+            for column in self.columns.values():
+                column[row] = MISSING
+        values = dict(obj.__dict__)
+        values.pop("id", None)
+        values.pop("_sa_instance_state", None)
+        for attr, times in (("created_at", self.created_at),
+                            ("updated_at", self.updated_at)):
+            times[row] = self._pack_time(values.get(attr))
+            if times[row] != NO_TIME:
+                del values[attr]
+        for attr, value in values.items():
+            column = self.columns.get(attr)
+            if column is None:
+                column = self.columns[attr] = [MISSING] * len(self.ids)
+            column[row] = self._pack(attr, value)
+
+    def remove(self, key):
+        """frees the row of key"""
+        id = self._id(key)
+        row = self.rows.pop(id)
+        self.ids[row] = None
+        self.created_at[row] = self.updated_at[row] = NO_TIME
+        for column in self.columns.values():
+            column[row] = MISSING
+        self.free.append(row)
+
+    def __getitem__(self, key):
+        """materializes the object stored under key"""
+        row = self.rows[self._id(key)]
+        obj = self.cls.__new__(self.cls)
+        attrs = obj.__dict__
+        attrs["id"] = self.ids[row]
+        for attr, times in (("created_at", self.created_at),
+                            ("updated_at", self.updated_at)):
+            if times[row] != NO_TIME:
+                attrs[attr] = EPOCH + times[row] * MICROSECOND
+        for attr, column in self.columns.items():
+            value = column[row]
+            if value is not MISSING:
+                attrs[attr] = list(value) if type(value) is tuple else value
+        return obj
+
+    def __contains__(self, key):
+        """tells if key is stored without materializing it"""
+        return (isinstance(key, str) and key.startswith(self.prefix) and
+                key[len(self.prefix):] in self.rows)
+
+    def __iter__(self):
+        """yields the key of every row in use"""
+        for id in self.ids:
+            if id is not None:
+                yield self.prefix + id
+
+    def __len__(self):
+        """returns the number of rows in use"""
+        return len(self.rows)
+
+
+class CompactObjects(MutableMapping):
+    """<class name>.id -> obj mapping backed by one ColumnTable per class"""
+
+    def __init__(self):
+        """creates an empty store"""
+        # dictionary - class name -> ColumnTable
+        self.tables = {}
+
+    def of_class(self, name):
+        """returns the <class name>.id -> obj mapping of class name"""
+        return self.tables.get(name, {})
+
+    def _table(self, key):
+        """returns the table of key, KeyError if there is none"""
+        table = self.tables.get(key.partition(".")[0])
+        if table is None:
+            raise KeyError(key)
+        return table
+
+    def __getitem__(self, key):
+        """materializes the object stored under key"""
+        return self._table(key)[key]
+
+    def __setitem__(self, key, obj):
+        """stores the attributes of obj under key"""
+        name = key.partition(".")[0]
+        table = self.tables.get(name)
+        if table is None:
+            table = self.tables[name] = ColumnTable(obj.__class__)
+        table.put(key, obj)
+
+    def __delitem__(self, key):
+        """removes key from the store"""
+        table = self._table(key)
+        if key not in table:
+            raise KeyError(key)
+        table.remove(key)
+
+    def __contains__(self, key):
+        """tells if key is stored without materializing it"""
+        table = self.tables.get(key.partition(".")[0])
+        return table is not None and key in table
+
+    def __iter__(self):
+        """yields every key, class by class"""
+        for table in list(self.tables.values()):
+            for key in table:
+                yield key
+
+    def __len__(self):
+        """returns the number of objects stored"""
+        return sum(len(table) for table in self.tables.values())
@@ -3,6 +3,8 @@
 Contains the class DBStorage.
 """
 
+from datetime import datetime
+import logging
 import models
 from models.amenity import Amenity
 from models.base_model import BaseModel, Base
@@ -13,11 +15,57 @@ from models.state import State
 from models.user import User
 from os import getenv
 import sqlalchemy
-from sqlalchemy import create_engine
-from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy import and_, create_engine, distinct, func, literal, or_
+from sqlalchemy import event, insert, select, union_all
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.orm import joinedload, scoped_session, selectinload
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool
+import threading
+import time
+import uuid
 
 classes = {"Amenity": Amenity, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
+loaders = {"selectin": selectinload, "joined": joinedload}
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetError(RuntimeError):
+    """raised when a request goes over a query threshold in raise mode"""
+
+
+class QueryLog:
+    """the statements run since the session was last closed"""
+
+    def __init__(self):
+        """creates an empty log"""
+        self.count = 0
+        self.seconds = 0.0
+        # dictionary - statement -> times it was run
+        self.statements = {}
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool that records how long checkouts wait for a connection"""
+    checkouts = 0
+    timeouts = 0
+    wait_seconds = 0.0
+    max_wait_seconds = 0.0
+
+    def _do_get(self):
+        """checks out a connection, timing the wait for a free one"""
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            wait = time.perf_counter() - start
+            self.checkouts += 1
+            self.wait_seconds += wait
+            self.max_wait_seconds = max(self.max_wait_seconds, wait)
 
 
 class DBStorage:
@@ -32,32 +80,205 @@ class DBStorage:
         HBNB_MYSQL_HOST = getenv('HBNB_MYSQL_HOST')
         HBNB_MYSQL_DB = getenv('HBNB_MYSQL_DB')
         HBNB_ENV = getenv('HBNB_ENV')
-        self.__engine = create_engine('mysql+mysqldb://{}:{}@{}/{}'.
-                                      format(HBNB_MYSQL_USER,
-                                             HBNB_MYSQL_PWD,
-                                             HBNB_MYSQL_HOST,
-                                             HBNB_MYSQL_DB))
+        # Connection pool sizing, see pool_stats() to tune it
+        pool_size = int(getenv('HBNB_MYSQL_POOL_SIZE', 5))
+        max_overflow = int(getenv('HBNB_MYSQL_MAX_OVERFLOW', 10))
+        pool_timeout = float(getenv('HBNB_MYSQL_POOL_TIMEOUT', 30))
+        pool_recycle = int(getenv('HBNB_MYSQL_POOL_RECYCLE', 3600))
+        pool_pre_ping = getenv('HBNB_MYSQL_POOL_PRE_PING', '1') == '1'
+        # HBNB_DB_URL points the engine at another database, e.g. SQLite
+        url = getenv('HBNB_DB_URL') or 'mysql+mysqldb://{}:{}@{}/{}'.format(
+            HBNB_MYSQL_USER, HBNB_MYSQL_PWD, HBNB_MYSQL_HOST, HBNB_MYSQL_DB)
+        self.__engine = create_engine(url,
+                                      poolclass=TimedQueuePool,
+                                      pool_size=pool_size,
+                                      max_overflow=max_overflow,
+                                      pool_timeout=pool_timeout,
+                                      pool_recycle=pool_recycle,
+                                      pool_pre_ping=pool_pre_ping)
         if HBNB_ENV == "test":
             Base.metadata.drop_all(self.__engine)
+        # callbacks told the class names of committed changes, see save();
+        # the names a session flushed are kept in its info["flushed"]
+        self.__listeners = []
+        # rows stream() fetches at a time
+        self.__stream_batch = int(getenv('HBNB_MYSQL_STREAM_BATCH', 500))
+        # seconds counts() are cached for, until save() changes the class
+        self.__count_ttl = float(getenv('HBNB_MYSQL_COUNT_TTL', 0))
+        # class name -> (expiry time, (row count, latest updated_at))
+        self.__table_stats = {}
+        # query thresholds checked per session, 0 turns one off
+        self.__max_queries = int(getenv('HBNB_MYSQL_MAX_QUERIES', 0))
+        self.__max_query_seconds = float(
+            getenv('HBNB_MYSQL_MAX_QUERY_SECONDS', 0))
+        self.__slow_query = float(getenv('HBNB_MYSQL_SLOW_QUERY', 0))
+        self.__repeated_queries = int(
+            getenv('HBNB_MYSQL_REPEATED_QUERIES', 0))
+        self.__query_check = getenv('HBNB_MYSQL_QUERY_CHECK', 'log')
+        # per thread, like the session: log and total statements run
+        self.__queries = threading.local()
+        event.listen(self.__engine, "before_cursor_execute",
+                     self._before_execute)
+        event.listen(self.__engine, "after_cursor_execute",
+                     self._after_execute)
 
-    def all(self, cls=None):
-        """query on the current database session"""
+    def all(self, cls=None, load=None, strategy="selectin", limit=None,
+            after=None):
+        """query on the current database session
+
+        load is a list of relationship paths such as "cities.places" to
+        load eagerly with the selectin or joined strategy, so walking them
+        afterwards does not issue one query per object. limit and after
+        return one page of each class, see _page().
+        """
         new_dict = {}
         for clss in classes:
-            if cls is None or cls is classes[clss] or cls is clss:
-                objs = self.__session.query(classes[clss]).all()
-                for obj in objs:
+            if cls is None or cls is classes[clss] or cls == clss:
+                query = self.__session.query(classes[clss])
+                if load:
+                    query = query.options(*self._load_options(
+                        classes[clss], load, strategy))
+                query = self._page(query, classes[clss], limit, after)
+                for obj in query.all():
                     key = obj.__class__.__name__ + '.' + obj.id
                     new_dict[key] = obj
         return (new_dict)
 
+    def all_by(self, cls, attr, value, limit=None, after=None):
+        """Return the objects of cls whose column attr equals value"""
+        if isinstance(cls, str):
+            cls = classes[cls]
+        query = self.__session.query(cls).filter(getattr(cls, attr) == value)
+        return {cls.__name__ + '.' + obj.id: obj
+                for obj in self._page(query, cls, limit, after)}
+
+    def stream(self, cls, attr=None, value=None):
+        """Return an iterator over the objects of cls, those whose column
+        attr equals value if attr is given
+
+        The rows are fetched HBNB_MYSQL_STREAM_BATCH (default 500) at a
+        time as the iterator is consumed, so the whole table is never
+        loaded at once.
+        """
+        if isinstance(cls, str):
+            cls = classes[cls]
+        query = self.__session.query(cls)
+        if attr is not None:
+            query = query.filter(getattr(cls, attr) == value)
+        return iter(query.yield_per(self.__stream_batch))
+
+    @staticmethod
+    def _page(query, cls, limit=None, after=None):
+        """restricts query to a keyset page if limit or after is given
+
+        The page holds the first limit rows ordered by (created_at, id)
+        that come after the (created_at, id) tuple after.
+        """
+        if limit is None and after is None:
+            return query
+        if after is not None:
+            query = query.filter(or_(cls.created_at > after[0],
+                                     and_(cls.created_at == after[0],
+                                          cls.id > after[1])))
+        query = query.order_by(cls.created_at, cls.id)
+        if limit is not None:
+            query = query.limit(limit)
+        return query
+
+    @staticmethod
+    def _load_options(cls, load, strategy="selectin"):
+        """builds the eager loading options for the relationship paths"""
+        options = []
+        for path in load:
+            option = None
+            owner = cls
+            for name in path.split("."):
+                attr = getattr(owner, name)
+                if option is None:
+                    option = loaders[strategy](attr)
+                else:
+                    option = getattr(option, strategy + "load")(attr)
+                owner = attr.property.mapper.class_
+            options.append(option)
+        return options
+
     def new(self, obj):
         """add the object to the current database session"""
         self.__session.add(obj)
 
+    def bulk_insert(self, cls, rows):
+        """insert the objects of cls described by to_dict() style rows
+
+        The rows go straight to the table with one executemany per set of
+        columns, without building ORM objects; the amenity_ids of places
+        become place_amenity rows. Nothing is committed before save().
+        """
+        from models.place import place_amenity
+        if isinstance(cls, str):
+            cls = classes[cls]
+        columns = set(cls.__table__.columns.keys())
+        groups = {}
+        links = []
+        for row in rows:
+            row = dict(row)
+            if "_User__password" in row:
+                # the hashed password of a User saved by FileStorage
+                row.setdefault("password", row.pop("_User__password"))
+            row.setdefault("id", str(uuid.uuid4()))
+            for attr in ("created_at", "updated_at"):
+                if isinstance(row.get(attr), str):
+                    row[attr] = datetime.fromisoformat(row[attr])
+            if cls is Place:
+                links.extend({"place_id": row["id"], "amenity_id": one}
+                             for one in row.get("amenity_ids") or ())
+            values = {key: value for key, value in row.items()
+                      if key in columns}
+            groups.setdefault(tuple(sorted(values)), []).append(values)
+        for values in groups.values():
+            self.__session.execute(insert(cls.__table__), values)
+        if links:
+            self.__session.execute(insert(place_amenity), links)
+        if groups:
+            self.__session.info.setdefault("flushed", set()).add(
+                cls.__name__)
+
     def save(self):
-        """commit all changes of the current database session"""
-        self.__session.commit()
+        """commit all changes of the current database session
+
+        Only the classes this thread's session flushed are reported, once
+        they are committed.
+        """
+        session = self.__session()
+        session.commit()
+        names = session.info.pop("flushed", None)
+        if names:
+            names = frozenset(names)
+            for name in names:
+                self.__table_stats.pop(name, None)
+            for callback in self.__listeners:
+                callback(names)
+
+    def subscribe(self, callback):
+        """calls callback(class names) after changes to them are committed
+
+        The classes are collected at flush time, so rows deleted by a
+        cascade are reported along with the objects passed to delete().
+        """
+        self.__listeners.append(callback)
+
+    @staticmethod
+    def _flushed(session, flush_context):
+        """records in the session the classes of the objects a flush
+        wrote"""
+        flushed = session.info.setdefault("flushed", set())
+        for obj in list(session.new) + list(session.dirty) + \
+                list(session.deleted):
+            flushed.add(obj.__class__.__name__)
+
+    @staticmethod
+    def _rolled_back(session):
+        """forgets the classes flushed by a session rolled back"""
+        session.info.pop("flushed", None)
 
     def delete(self, obj=None):
         """delete from the current database session obj if not None"""
@@ -68,24 +289,206 @@ class DBStorage:
         """reloads data from the database"""
         Base.metadata.create_all(self.__engine)
         sess_factory = sessionmaker(bind=self.__engine, expire_on_commit=False)
+        event.listen(sess_factory, "after_flush", self._flushed)
+        event.listen(sess_factory, "after_rollback", self._rolled_back)
         Session = scoped_session(sess_factory)
         self.__session = Session
 
     def close(self):
-        """call remove() method on the private session attribute"""
-        self.__session.remove()
+        """call remove() method on the private session attribute
+
+        The statements run by the session are checked against
+        HBNB_MYSQL_MAX_QUERY_SECONDS and their log is started over.
+        """
+        try:
+            self.__session.remove()
+            log = self.query_log()
+            if self.__max_query_seconds and \
+                    log.seconds > self.__max_query_seconds:
+                self._report("{} queries took {:.3f}s, more than "
+                             "HBNB_MYSQL_MAX_QUERY_SECONDS".format(
+                                 log.count, log.seconds))
+        finally:
+            self.__queries.log = QueryLog()
+
+    def query_log(self):
+        """Return the QueryLog of the statements the thread ran since the
+        session was last closed (for a request, since it started)"""
+        log = getattr(self.__queries, "log", None)
+        if log is None:
+            log = self.__queries.log = QueryLog()
+        return log
+
+    def query_count(self):
+        """Return the number of statements the thread ran so far"""
+        return getattr(self.__queries, "total", 0)
+
+    def _before_execute(self, conn, cursor, statement, parameters,
+                        context, executemany):
+        """records when the statement started"""
+        conn.info.setdefault("query_start", []).append(time.perf_counter())
+
+    def _after_execute(self, conn, cursor, statement, parameters,
+                       context, executemany):
+        """logs the statement and checks the thresholds
 
-    def get(self, cls, id):
-        """Retrieve one object based on class and ID"""
+        A statement slower than HBNB_MYSQL_SLOW_QUERY seconds, the query
+        past HBNB_MYSQL_MAX_QUERIES and a statement run more than
+        HBNB_MYSQL_REPEATED_QUERIES times (an N+1 pattern: one lazy load
+        per object) since the session was closed are reported.
+        """
+        seconds = time.perf_counter() - conn.info["query_start"].pop()
+        self.__queries.total = self.query_count() + 1
+        log = self.query_log()
+        log.count += 1
+        log.seconds += seconds
+        repeats = log.statements[statement] = \
+            log.statements.get(statement, 0) + 1
+        if self.__slow_query and seconds > self.__slow_query:
+            self._report("slow query ({:.3f}s): {}".format(seconds,
+                                                           statement))
+        if self.__max_queries and log.count == self.__max_queries + 1:
+            self._report("more than HBNB_MYSQL_MAX_QUERIES={} queries, "
+                         "the last one: {}".format(self.__max_queries,
+                                                   statement))
+        if self.__repeated_queries and \
+                repeats == self.__repeated_queries + 1:
+            self._report("query run more than {} times, possible N+1: {}"
+                         .format(self.__repeated_queries, statement))
+
+    def _report(self, message):
+        """logs message, or raises it with HBNB_MYSQL_QUERY_CHECK=raise"""
+        if self.__query_check == "raise":
+            raise QueryBudgetError(message)
+        logger.warning(message)
+
+    def get(self, cls, id, load=None, strategy="selectin"):
+        """Retrieve one object based on class and ID
+
+        load eagerly loads relationship paths as in all().
+        """
         if cls and id:
-            return self.__session.query(cls).filter_by(id=id).first()
+            if isinstance(cls, str):
+                cls = classes[cls]
+            query = self.__session.query(cls)
+            if load:
+                query = query.options(*self._load_options(cls, load,
+                                                          strategy))
+            return query.filter_by(id=id).first()
         return None
 
+    def get_many(self, cls, ids, load=None, strategy="selectin"):
+        """Retrieve the objects of cls with the ids, as id -> object
+
+        All of them are read with a single IN query. Ids that are not
+        strings or match no row are left out. load as in all().
+        """
+        if isinstance(cls, str):
+            cls = classes[cls]
+        ids = {id for id in ids if isinstance(id, str)}
+        if not ids:
+            return {}
+        query = self.__session.query(cls).filter(cls.id.in_(ids))
+        if load:
+            query = query.options(*self._load_options(cls, load, strategy))
+        return {obj.id: obj for obj in query}
+
+    def search_places(self, states=(), cities=(), amenities=(), limit=None,
+                      after=None):
+        """Return the places in the states or cities having every amenity
+
+        The whole filter runs as one query: the cities of the states are
+        a subquery and the amenities are matched with GROUP BY/HAVING on
+        place_amenity. limit and after as in all().
+        """
+        from models.place import place_amenity
+        query = self.__session.query(Place)
+        if states or cities:
+            in_states = select(City.id).where(City.state_id.in_(states))
+            query = query.filter(or_(Place.city_id.in_(cities),
+                                     Place.city_id.in_(in_states)))
+        amenities = set(amenities)
+        if amenities:
+            having = (select(place_amenity.c.place_id)
+                      .where(place_amenity.c.amenity_id.in_(amenities))
+                      .group_by(place_amenity.c.place_id)
+                      .having(func.count(distinct(
+                          place_amenity.c.amenity_id)) == len(amenities)))
+            query = query.filter(Place.id.in_(having))
+        return self._page(query, Place, limit, after).all()
+
     def count(self, cls=None):
         """Count the number of objects in storage"""
         if cls:
-            return self.__session.query(cls).count()
-        count = 0
-        for clss in classes.values():
-            count += self.__session.query(clss).count()
-        return count
+            name = cls if isinstance(cls, str) else cls.__name__
+            return self.counts([name])[name]
+        return sum(self.counts().values())
+
+    def counts(self, clss=None):
+        """Count the objects of several classes in a single query
+
+        Returns a dictionary of class name -> count for the classes (or
+        class names) in clss, or for every class if clss is None.
+        """
+        return {name: stats[0]
+                for name, stats in self._table_stats(clss).items()}
+
+    def versions(self, clss=None):
+        """Return class name -> a version that changes with its rows
+
+        The version is the row count and latest updated_at of the table:
+        inserts and updates move the latest updated_at and deletes change
+        the count.
+        """
+        return {name: "{}.{}".format(n, latest and latest.isoformat())
+                for name, (n, latest) in self._table_stats(clss).items()}
+
+    def _table_stats(self, clss=None):
+        """Return class name -> (row count, latest updated_at) of clss
+
+        The classes missing from the cache are read in a single query.
+        With HBNB_MYSQL_COUNT_TTL set, the results are cached for that
+        many seconds or until save() commits a change to the class, so
+        /stats does not query the database on every call.
+        """
+        names = [c if isinstance(c, str) else c.__name__
+                 for c in (clss or classes)]
+        now = time.monotonic()
+        stats = {}
+        for name in names:
+            cached = self.__table_stats.get(name)
+            if cached is not None and cached[0] > now:
+                stats[name] = cached[1]
+        missing = [name for name in names if name not in stats]
+        if missing:
+            stmt = self._stats_statement(missing)
+            for name, n, latest in self.__session.execute(stmt):
+                stats[name] = (n, latest)
+                # rows flushed but not committed may still be rolled back
+                if self.__count_ttl > 0 and \
+                        not self.__session.info.get("flushed"):
+                    self.__table_stats[name] = (now + self.__count_ttl,
+                                                (n, latest))
+        return {name: stats[name] for name in names}
+
+    @staticmethod
+    def _stats_statement(names):
+        """builds the query of (class name, row count, latest updated_at)
+        of the class names, one UNION ALL branch per table"""
+        return union_all(*[select(literal(name).label("cls"),
+                                  func.count().label("n"),
+                                  func.max(classes[name].updated_at))
+                           .select_from(classes[name].__table__)
+                           for name in names])
+
+    def pool_stats(self):
+        """Return the connection pool usage and checkout wait metrics"""
+        pool = self.__engine.pool
+        stats = {"status": pool.status()}
+        for name in ("size", "checkedin", "checkedout", "overflow"):
+            if hasattr(pool, name):
+                stats[name] = getattr(pool, name)()
+        for name in ("checkouts", "timeouts", "wait_seconds",
+                     "max_wait_seconds"):
+            stats[name] = getattr(pool, name, 0)
+        return stats
@@ -3,10 +3,29 @@
 Contains the FileStorage class
 """
 
+import contextlib
+from datetime import datetime
+import heapq
 import json
+import os
+from os import getenv
+import threading
+import time
+import uuid
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+try:
+    import resource
+except ImportError:
+    resource = None
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
+from models.engine.compact_store import CompactObjects
+from models.engine.json_backend import dumps
+from models.engine.rwlock import RWLock, reads, writes
 from models.place import Place
 from models.review import Review
 from models.state import State
@@ -15,72 +34,728 @@ from models.user import User
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
 
+# foreign key attributes indexed for each class name, a list attribute
+# is indexed under each of its values
+foreign_keys = {"City": ("state_id",),
+                "Place": ("city_id", "user_id", "amenity_ids"),
+                "Review": ("place_id", "user_id")}
+
+
+def iter_json_objects(f, chunk_size=1 << 16):
+    """yields the (key, value) pairs of the JSON object read from f
+
+    The file is decoded one member at a time from chunk_size reads, so the
+    whole document is never held in memory. Raises ValueError if the file
+    is not a complete JSON object.
+    """
+    decoder = json.JSONDecoder()
+    buf = ""
+    pos = 0
+    eof = False
+
+    def fill(buf, pos):
+        """drops the consumed part of buf and appends the next chunk"""
+        chunk = f.read(chunk_size)
+        return buf[pos:] + chunk, 0, chunk == ""
+
+    def skip(buf, pos, eof):
+        """skips whitespace, reading more until a token char or EOF"""
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\n\r":
+                pos += 1
+            if pos < len(buf) or eof:
+                return buf, pos, eof
+            buf, pos, eof = fill(buf, pos)
+
+    def decode(buf, pos, eof):
+        """decodes one JSON value at pos, reading more while incomplete"""
+        while True:
+            try:
+                value, end = decoder.raw_decode(buf, pos)
+                # a number or literal may continue in the next chunk
+                if end < len(buf) or eof or buf[end - 1] in '"}]':
+                    return value, buf, end, eof
+            except ValueError:
+                if eof:
+                    raise
+            buf, pos, eof = fill(buf, pos)
+
+    buf, pos, eof = skip(buf, pos, eof)
+    if buf[pos:pos + 1] != "{":
+        raise ValueError("expected a JSON object")
+    pos += 1
+    buf, pos, eof = skip(buf, pos, eof)
+    if buf[pos:pos + 1] == "}":
+        return
+    while True:
+        key, buf, pos, eof = decode(buf, pos, eof)
+        buf, pos, eof = skip(buf, pos, eof)
+        if buf[pos:pos + 1] != ":":
+            raise ValueError("expected ':' after key")
+        buf, pos, eof = skip(buf, pos + 1, eof)
+        value, buf, pos, eof = decode(buf, pos, eof)
+        yield key, value
+        buf, pos, eof = skip(buf, pos, eof)
+        sep = buf[pos:pos + 1]
+        pos += 1
+        if sep == "}":
+            return
+        if sep != ",":
+            raise ValueError("expected ',' or '}'")
+        buf, pos, eof = skip(buf, pos, eof)
+
 
 class FileStorage:
-    """serializes instances to a JSON file & deserializes back to instances"""
+    """serializes instances to a JSON file & deserializes back to instances
+
+    The public methods are safe to call from several threads: readers
+    share lock, writers (new, delete, save, reload...) hold it alone.
+    all() without a class returns the live dictionary, the other reads
+    return copies.
+    """
+
+    # RWLock - shared by reads, exclusive for writes
+    lock = RWLock()
+    # lock - serializes rebuilding the indexes from a read
+    __index_lock = threading.Lock()
 
     # string - path to the JSON file
     __file_path = "file.json"
-    # dictionary - empty but will store all objects by <class name>.id
-    __objects = {}
+    # dictionary - empty but will store all objects by <class name>.id,
+    # a CompactObjects store of columns per class if HBNB_FILE_COMPACT=1
+    __objects = CompactObjects() if getenv("HBNB_FILE_COMPACT") == "1" else {}
+    # dictionary - <class name> -> {<class name>.id: obj}
+    __by_class = {}
+    # dictionary - (<class name>, fk attribute) -> {fk value: {key: obj}}
+    __by_fk = {}
+    # dictionary - <class name>.id -> fk values the object is indexed under
+    __fk_values = {}
+    # the __objects dict the indexes above were built from
+    __indexed = None
+    # int - objects in the indexes above
+    __indexed_count = 0
+    # bool - append mutations to a journal instead of rewriting the file
+    __journal = getenv("HBNB_FILE_JOURNAL") == "1"
+    # int - journal records after which save() compacts into the file
+    __compact_after = int(getenv("HBNB_FILE_JOURNAL_COMPACT", 1000))
+    # int - records currently in the journal
+    __journal_records = 0
+    # bool - lock the file around save() and merge what others saved
+    __locking = getenv("HBNB_FILE_LOCK") == "1"
+    # dictionary - <class name>.id -> obj (or None once deleted) not saved
+    __pending = {}
+    # (inode, size, mtime) of the snapshot generation __objects reflects
+    __snapshot_stat = None
+    # the __objects dict that generation was loaded into
+    __snapshot_objects = None
+    # dictionary - objects and seconds of the last snapshot load, with the
+    # peak RSS of the process after it
+    __reload_stats = {}
+    # (__objects dict, inode, byte offset) the journal was replayed up to
+    __journal_pos = None
+    # list - callbacks told the class names of changed objects
+    __listeners = []
+    # set - class names changed since the listeners were last told
+    __changed_classes = set()
+    # dictionary - class name -> number of times its objects changed
+    __versions = {}
+    # string - tells the versions of this process from another one's
+    __boot = uuid.uuid4().hex[:12]
+
+    @staticmethod
+    def _class_name(cls):
+        """returns the class name for a class or a class name string"""
+        if isinstance(cls, str):
+            return cls
+        return cls.__name__
+
+    def _compact(self):
+        """tells if __objects is a CompactObjects store
+
+        Its objects are materialized on access, so the indexes then keep
+        no reference to them: the class index is the store's own table,
+        the foreign key buckets map keys to None (see _resolve()) and the
+        indexed fk values are read back from the stored row.
+        """
+        return isinstance(self.__objects, CompactObjects)
+
+    @staticmethod
+    def _fk_values(name, obj):
+        """returns the foreign key values of obj, lists as tuples
+
+        Raises ValueError if a value (or an item of a list) can not be a
+        key of the foreign key index, e.g. a dict.
+        """
+        values = []
+        for attr in foreign_keys.get(name, ()):
+            value = getattr(obj, attr, None)
+            if isinstance(value, list):
+                value = tuple(value)
+            try:
+                hash(value)
+            except TypeError:
+                raise ValueError("{}.{} must be an id or a list of ids"
+                                 .format(name, attr)) from None
+            values.append(value)
+        return tuple(values)
+
+    def _index(self, key, obj, values=None):
+        """adds obj to the class and foreign key indexes
+
+        values are the foreign key values of obj, if already read.
+        """
+        name = obj.__class__.__name__
+        compact = self._compact()
+        ref = None if compact else obj
+        if values is None:
+            values = self._fk_values(name, obj)
+        if not compact:
+            self.__by_class.setdefault(name, {})[key] = obj
+            self.__fk_values[key] = values
+        for attr, value in zip(foreign_keys.get(name, ()), values):
+            index = self.__by_fk.setdefault((name, attr), {})
+            for one in (value if isinstance(value, tuple) else (value,)):
+                index.setdefault(one, {})[key] = ref
+        FileStorage.__indexed_count += 1
 
-    def all(self, cls=None):
-        """returns the dictionary __objects"""
+    def _unindex(self, key, obj):
+        """removes obj from the class and foreign key indexes"""
+        name = obj.__class__.__name__
+        if self._compact():
+            values = self._fk_values(name, obj)
+        else:
+            self.__by_class.get(name, {}).pop(key, None)
+            values = self.__fk_values.pop(key, ())
+        FileStorage.__indexed_count -= 1
+        for attr, value in zip(foreign_keys.get(name, ()), values):
+            index = self.__by_fk.get((name, attr), {})
+            for one in (value if isinstance(value, tuple) else (value,)):
+                bucket = index.get(one)
+                if bucket is not None:
+                    bucket.pop(key, None)
+                    if not bucket:
+                        del index[one]
+
+    def _check_index(self):
+        """rebuilds the indexes if __objects was replaced or edited directly"""
+        if (FileStorage.__indexed is self.__objects and
+                self.__indexed_count == len(self.__objects)):
+            return
+        with self.__index_lock:
+            if (FileStorage.__indexed is self.__objects and
+                    self.__indexed_count == len(self.__objects)):
+                return
+            self._rebuild_index()
+
+    def _rebuild_index(self):
+        """indexes every object of __objects from scratch"""
+        self.__by_class.clear()
+        self.__by_fk.clear()
+        self.__fk_values.clear()
+        FileStorage.__indexed_count = 0
+        for key, obj in self.__objects.items():
+            self._index(key, obj)
+        FileStorage.__indexed = self.__objects
+
+    def _class_objects(self, name):
+        """returns the {<class name>.id: obj} mapping of class name"""
+        if self._compact():
+            return self.__objects.of_class(name)
+        return self.__by_class.get(name, {})
+
+    def _resolve(self, bucket):
+        """returns a foreign key index bucket as {key: obj}"""
+        if self._compact():
+            return {key: self.__objects[key] for key in bucket}
+        return bucket
+
+    @reads
+    def all(self, cls=None, load=None, strategy=None, limit=None,
+            after=None):
+        """returns the dictionary __objects
+
+        load and strategy are accepted for DBStorage compatibility, the
+        relationship getters already read from the indexes. limit and after
+        return one page ordered by (created_at, id), see _page().
+        """
         if cls is not None:
-            new_dict = {}
-            for key, value in self.__objects.items():
-                if cls == value.__class__ or cls == value.__class__.__name__:
-                    new_dict[key] = value
-            return new_dict
+            self._check_index()
+            return self._page(self._class_objects(self._class_name(cls)),
+                              limit, after)
+        if limit is not None or after is not None:
+            return self._page(self.__objects, limit, after)
         return self.__objects
 
+    @staticmethod
+    def _page(objs, limit=None, after=None):
+        """returns a copy of objs, or one page of it if limit or after
+
+        A page holds the first limit objects ordered by (created_at, id)
+        that come after the (created_at, id) tuple after.
+        """
+        if limit is None and after is None:
+            return dict(objs)
+        items = objs.items()
+        if after is not None:
+            items = [(key, obj) for key, obj in items
+                     if (obj.created_at, obj.id) > after]
+
+        def order(item):
+            """keyset order of a (key, obj) item"""
+            return (item[1].created_at, item[1].id)
+        if limit is None:
+            return dict(sorted(items, key=order))
+        return dict(heapq.nsmallest(limit, items, key=order))
+
+    @reads
+    def all_by(self, cls, attr, value, limit=None, after=None):
+        """returns the objects of cls whose attribute attr equals value"""
+        self._check_index()
+        name = self._class_name(cls)
+        if (name, attr) in self.__by_fk or attr in foreign_keys.get(name, ()):
+            return self._page(self._resolve(
+                self.__by_fk.get((name, attr), {}).get(value, {})),
+                limit, after)
+        return self._page({key: obj for key, obj in
+                           self._class_objects(name).items()
+                           if getattr(obj, attr, None) == value},
+                          limit, after)
+
+    def stream(self, cls, attr=None, value=None):
+        """returns an iterator over the objects of cls, those whose
+        attribute attr equals value if attr is given"""
+        if attr is None:
+            return iter(self.all(cls).values())
+        return iter(self.all_by(cls, attr, value).values())
+
+    @reads
+    def search_places(self, states=(), cities=(), amenities=(), limit=None,
+                      after=None):
+        """returns the places in the states or cities having every amenity
+
+        Without states and cities every place is a candidate. The result
+        is the intersection of the place keys indexed under each amenity,
+        starting from the smallest set. limit and after as in all().
+        """
+        self._check_index()
+        by_city = self.__by_fk.get(("Place", "city_id"), {})
+        by_amenity = self.__by_fk.get(("Place", "amenity_ids"), {})
+        places = self._class_objects("Place")
+        keys = None
+        if states or cities:
+            city_ids = set(cities)
+            by_state = self.__by_fk.get(("City", "state_id"), {})
+            for state_id in states:
+                city_ids.update(key.partition(".")[2] for key in
+                                by_state.get(state_id, {}))
+            keys = set()
+            for city_id in city_ids:
+                keys.update(by_city.get(city_id, {}))
+        buckets = sorted((by_amenity.get(amenity_id, {})
+                          for amenity_id in set(amenities)), key=len)
+        for bucket in buckets:
+            keys = set(bucket) if keys is None else keys & bucket.keys()
+        if keys is not None:
+            places = {key: places[key] for key in keys}
+        return list(self._page(places, limit, after).values())
+
+    def subscribe(self, callback):
+        """calls callback(class names) after objects of them change
+
+        new(), delete() and a reload() that read changes from disk each
+        notify the classes they touched once.
+        """
+        self.__listeners.append(callback)
+
+    def _notify(self):
+        """tells the listeners which classes changed since last time"""
+        if self.__changed_classes:
+            names = frozenset(self.__changed_classes)
+            self.__changed_classes.clear()
+            for name in names:
+                self.__versions[name] = self.__versions.get(name, 0) + 1
+            for callback in self.__listeners:
+                callback(names)
+
+    def _put(self, key, obj):
+        """stores obj under key in __objects and the indexes
+
+        The foreign key values are checked first, so an object the indexes
+        can not hold raises ValueError and leaves the storage unchanged.
+        """
+        values = self._fk_values(obj.__class__.__name__, obj)
+        self.__changed_classes.add(key.partition(".")[0])
+        old = self.__objects.get(key)
+        if old is not None:
+            self._unindex(key, old)
+        self.__objects[key] = obj
+        self._index(key, obj, values)
+
+    def _remove(self, key):
+        """removes key from __objects and the indexes"""
+        if key in self.__objects:
+            self.__changed_classes.add(key.partition(".")[0])
+            self._unindex(key, self.__objects[key])
+            del self.__objects[key]
+
+    def _journal_path(self):
+        """returns the path of the journal next to the JSON file"""
+        return self.__file_path + ".journal"
+
+    @writes
     def new(self, obj):
         """sets in __objects the obj with key <obj class name>.id"""
         if obj is not None:
+            self._check_index()
             key = obj.__class__.__name__ + "." + obj.id
-            self.__objects[key] = obj
+            self._put(key, obj)
+            if self.__journal or self.__locking:
+                self.__pending[key] = obj
+            self._notify()
+
+    @writes
+    def bulk_insert(self, cls, rows):
+        """stores the objects of cls described by to_dict() style rows
 
+        Nothing is written before save(), so a whole import costs a single
+        snapshot write, and the listeners are told once.
+        """
+        self._check_index()
+        cls = classes[self._class_name(cls)]
+        for row in rows:
+            obj = cls(**row)
+            key = cls.__name__ + "." + obj.id
+            self._put(key, obj)
+            if self.__journal or self.__locking:
+                self.__pending[key] = obj
+        self._notify()
+
+    @contextlib.contextmanager
+    def _locked(self):
+        """holds the advisory lock of the JSON file in locking mode
+
+        The lock is taken on <file>.lock with flock(), so it only excludes
+        other writers: readers see the atomically renamed snapshots.
+        """
+        if not self.__locking or fcntl is None:
+            yield
+            return
+        with open(self.__file_path + ".lock", "a") as f:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+    @writes
     def save(self):
-        """serializes __objects to the JSON file (path: __file_path)"""
+        """serializes __objects to the JSON file (path: __file_path)
+
+        In journal mode only the objects passed to new() or delete() since
+        the last save are appended to the journal, which is compacted into
+        the JSON file every __compact_after records.
+
+        In locking mode (HBNB_FILE_LOCK=1) several processes can share the
+        file: save() holds the file lock while it reloads what the others
+        saved since the last load, keeping the objects changed here since
+        then, and writes the result.
+        """
+        with self._locked():
+            if self.__locking:
+                self.reload()
+            self._save()
+
+    def _save(self):
+        """writes the changes to the journal or the whole JSON file"""
+        if not self.__journal:
+            self.compact()
+            return
+        path = self._journal_path()
+        # only skip our own records on replay if nobody appended since
+        caught_up = self._journal_unchanged(self._stat(path))
+        with open(path, 'ab+') as f:
+            f.seek(0, os.SEEK_END)
+            if f.tell() and not caught_up:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    # keep a torn record from swallowing the next one
+                    f.write(b"\n")
+            for key, obj in self.__pending.items():
+                if obj is None:
+                    record = {"op": "delete", "key": key}
+                else:
+                    record = {"op": "put", "key": key,
+                              "obj": obj.to_dict(save_fs=1)}
+                f.write(dumps(record).encode() + b"\n")
+            if caught_up:
+                FileStorage.__journal_pos = (self.__objects,
+                                             os.fstat(f.fileno()).st_ino,
+                                             f.tell())
+        FileStorage.__journal_records += len(self.__pending)
+        self.__pending.clear()
+        if self.__journal_records >= self.__compact_after:
+            self.compact()
+
+    @writes
+    def compact(self):
+        """writes every object to the JSON file and empties the journal"""
         json_objects = {}
         for key in self.__objects:
-            json_objects[key] = self.__objects[key].to_dict()
-        with open(self.__file_path, 'w') as f:
-            json.dump(json_objects, f)
+            json_objects[key] = self.__objects[key].to_dict(save_fs=1)
+        self._write_snapshot(json_objects)
+        if self.__journal_records:
+            open(self._journal_path(), 'w').close()
+            FileStorage.__journal_records = 0
+        FileStorage.__journal_pos = None
+        self.__pending.clear()
 
+    @writes
     def reload(self):
-        """Deserializes the JSON file to __objects"""
+        """Deserializes the JSON file to __objects, then replays the journal
+
+        Only what changed on disk since the last reload or save is read:
+        an unchanged snapshot is skipped, objects whose updated_at did not
+        change are kept as they are, and only the journal records appended
+        since the last replay are applied. A snapshot is parsed whole before
+        any of its objects is stored, so a torn one changes nothing and the
+        previous generation (.bak) is read instead. A missing file is read
+        as an empty store.
+        """
+        self._check_index()
+        stat = self._stat(self.__file_path)
+        if (stat != self.__snapshot_stat or
+                self.__snapshot_objects is not self.__objects):
+            # a new snapshot may come from a compaction: replay it all
+            FileStorage.__journal_pos = None
+            for path in (self.__file_path, self.__file_path + ".bak"):
+                start = time.perf_counter()
+                loaded = 0
+                # keys of the snapshot, to drop what another process deleted
+                seen = set() if self.__locking else None
+                # key -> new or changed object, stored once all parsed
+                staged = {}
+                try:
+                    with open(path, 'r') as f:
+                        for key, value in iter_json_objects(f):
+                            if (key not in self.__pending and
+                                    self._changed(key, value)):
+                                obj = classes[value["__class__"]](**value)
+                                self._fk_values(value["__class__"], obj)
+                                staged[key] = obj
+                            if seen is not None:
+                                seen.add(key)
+                            loaded += 1
+                except FileNotFoundError:
+                    # no snapshot (e.g. deleted to reset the store) is an
+                    # empty store, the .bak only stands in for a torn one
+                    break
+                except ValueError:
+                    # torn or corrupt snapshot, try the previous generation
+                    continue
+                for key, obj in staged.items():
+                    self._put(key, obj)
+                FileStorage.__reload_stats = {
+                    "path": path,
+                    "objects": loaded,
+                    "seconds": time.perf_counter() - start,
+                    "max_rss_kb": (resource.getrusage(
+                        resource.RUSAGE_SELF).ru_maxrss
+                        if resource else None)}
+                if seen is not None:
+                    for key in [key for key in self.__objects
+                                if key not in seen and
+                                key not in self.__pending]:
+                        self._remove(key)
+                break
+            if stat is None or path == self.__file_path:
+                self._loaded(stat)
+        self._replay()
+        self._notify()
+
+    def _changed(self, key, value):
+        """tells if the stored object for key is older than value"""
+        obj = self.__objects.get(key)
+        if obj is None or not isinstance(value.get("updated_at"), str):
+            return True
         try:
-            with open(self.__file_path, 'r') as f:
-                jo = json.load(f)
-            for key, value in jo.items():
-                self.__objects[key] = classes[value["__class__"]](**value)
+            return obj.updated_at != datetime.fromisoformat(
+                value["updated_at"])
+        except (AttributeError, ValueError):
+            return True
+
+    def _journal_unchanged(self, stat):
+        """tells if the journal with stat has nothing left to replay"""
+        pos = self.__journal_pos
+        if stat is None:
+            return pos is None
+        return (pos is not None and pos[0] is self.__objects and
+                pos[1:] == stat[:2])
+
+    def reload_stats(self):
+        """returns the path, objects and seconds of the last snapshot load
+
+        max_rss_kb is the process peak RSS after the load (ru_maxrss), the
+        largest since the process started, not the cost of the load alone.
+        """
+        return dict(self.__reload_stats)
+
+    @staticmethod
+    def _stat(path):
+        """returns what identifies a snapshot generation on disk"""
+        try:
+            st = os.stat(path)
         except FileNotFoundError:
+            return None
+        return (st.st_ino, st.st_size, st.st_mtime_ns)
+
+    def _loaded(self, stat):
+        """records that __objects now reflects the snapshot with stat"""
+        FileStorage.__snapshot_stat = stat
+        FileStorage.__snapshot_objects = self.__objects
+
+    def _write_snapshot(self, json_objects):
+        """atomically replaces the JSON file with json_objects
+
+        The new generation is written and fsynced to a temporary file that
+        is then renamed over the JSON file, so readers see either the old
+        or the new file, never a truncated one. The previous generation is
+        kept as <file>.bak for reload() to fall back on.
+        """
+        path = self.__file_path
+        tmp = "{}.{}.tmp".format(path, os.getpid())
+        with open(tmp, 'w') as f:
+            f.write(dumps(json_objects))
+            f.flush()
+            os.fsync(f.fileno())
+        if os.path.exists(path):
+            try:
+                os.link(path, tmp + ".bak")
+                os.replace(tmp + ".bak", path + ".bak")
+            except OSError:
+                pass
+        os.replace(tmp, path)
+        try:
+            fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY)
+            try:
+                os.fsync(fd)
+            finally:
+                os.close(fd)
+        except OSError:
             pass
-        except ValueError:
-            # Handle invalid JSON content gracefully
-            pass
+        self._loaded(self._stat(path))
+
+    def _replay(self):
+        """applies the journal records appended since the last replay"""
+        path = self._journal_path()
+        stat = self._stat(path)
+        if self._journal_unchanged(stat):
+            return
+        pos = self.__journal_pos
+        if stat is None:
+            FileStorage.__journal_pos = None
+            FileStorage.__journal_records = 0
+            return
+        offset = records = 0
+        if (pos is not None and pos[0] is self.__objects and
+                pos[1] == stat[0] and pos[2] <= stat[1]):
+            offset, records = pos[2], self.__journal_records
+        with open(path, 'rb') as f:
+            f.seek(offset)
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # record still being appended by another writer
+                    break
+                offset += len(line)
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    # torn record of an interrupted append
+                    continue
+                if record["key"] in self.__pending:
+                    # changed here since, our record comes later
+                    pass
+                elif record["op"] == "delete":
+                    self._remove(record["key"])
+                else:
+                    value = record["obj"]
+                    self._put(record["key"],
+                              classes[value["__class__"]](**value))
+                records += 1
+        FileStorage.__journal_pos = (self.__objects, stat[0], offset)
+        FileStorage.__journal_records = records
 
+    @writes
     def delete(self, obj=None):
         """delete obj from __objects if it’s inside"""
         if obj is not None:
+            self._check_index()
             key = obj.__class__.__name__ + '.' + obj.id
             if key in self.__objects:
-                del self.__objects[key]
+                self._remove(key)
+                if self.__journal or self.__locking:
+                    self.__pending[key] = None
+                self._notify()
 
     def close(self):
-        """call reload() method for deserializing the JSON file to objects"""
+        """reloads what changed in the JSON file and journal since last time
+
+        Called on every request teardown, so it only stats the files unless
+        another process wrote to them.
+        """
         self.reload()
 
-    def get(self, cls, id):
-        """Retrieve one object"""
-        if cls and id:
-            key = f"{}.{}".format(cls.name, id)
-            return self.__objects.get(key, None)
+    @reads
+    def get(self, cls, id, load=None, strategy=None):
+        """Retrieve one object (load and strategy as in all())
+
+        A single lookup of the "<class name>.<id>" key, whatever the
+        number of objects.
+        """
+        if cls and isinstance(id, str) and id:
+            return self.__objects.get(self._class_name(cls) + "." + id)
         return None
 
+    @reads
+    def get_many(self, cls, ids):
+        """Retrieve the objects of cls with the ids, as id -> object
+
+        Ids that are not strings or match no object are left out.
+        """
+        prefix = self._class_name(cls) + "."
+        found = {}
+        for id in ids:
+            if isinstance(id, str) and id not in found:
+                obj = self.__objects.get(prefix + id)
+                if obj is not None:
+                    found[id] = obj
+        return found
+
+    @reads
     def count(self, cls=None):
-        """Count the number of objects in storage"""
+        """Count the number of objects in storage, in constant time"""
         if cls:
-            return len(self.all(cls))
+            return self.counts([cls])[self._class_name(cls)]
         return len(self.__objects)
+
+    @reads
+    def versions(self, clss=None):
+        """returns class name -> a version that changes with its objects
+
+        The version counts the changes seen by this process, objects
+        written by another one count once reload() picked them up.
+        """
+        names = [self._class_name(c) for c in (clss or classes)]
+        return {name: "{}.{}".format(self.__boot,
+                                     self.__versions.get(name, 0))
+                for name in names}
+
+    @reads
+    def counts(self, clss=None):
+        """returns class name -> count for clss, or for every class
+
+        The counts are the sizes of the class indexes that new(), delete()
+        and reload() keep up to date, no object is visited.
+        """
+        self._check_index()
+        names = [self._class_name(c) for c in (clss or classes)]
+        return {name: len(self._class_objects(name)) for name in names}
@@ -0,0 +1,37 @@
+#!/usr/bin/python3
+"""
+Contains dumps(), the JSON encoder used by the storage engines and API
+
+orjson or ujson is used when installed, the json module otherwise.
+All of them return a str holding compact JSON.
+"""
+
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+if orjson is not None:
+    backend = "orjson"
+
+    def dumps(obj):
+        """returns obj encoded as JSON"""
+        return orjson.dumps(obj).decode()
+elif ujson is not None:
+    backend = "ujson"
+
+    def dumps(obj):
+        """returns obj encoded as JSON"""
+        return ujson.dumps(obj, ensure_ascii=False)
+else:
+    backend = "json"
+
+    def dumps(obj):
+        """returns obj encoded as JSON"""
+        return json.dumps(obj, separators=(",", ":"))
@@ -0,0 +1,91 @@
+#!/usr/bin/python3
+"""
+Contains the RWLock class and the decorators FileStorage uses it with
+"""
+
+import contextlib
+import functools
+import threading
+
+
+class RWLock:
+    """reader-writer lock: any number of readers or a single writer
+
+    Waiting writers go first, so a steady flow of readers cannot starve
+    them. A thread holding the lock may take it again: the writer in
+    either mode, a reader only to read.
+    """
+
+    def __init__(self):
+        """creates an unlocked lock"""
+        self.__cond = threading.Condition(threading.Lock())
+        # dictionary - thread ident -> read depth
+        self.__readers = {}
+        # thread ident of the writer, None if there is none
+        self.__writer = None
+        self.__depth = 0
+        # int - writers waiting for the readers to leave
+        self.__waiting = 0
+
+    @contextlib.contextmanager
+    def reading(self):
+        """holds the lock shared for the with block"""
+        me = threading.get_ident()
+        with self.__cond:
+            if self.__writer != me and me not in self.__readers:
+                while self.__writer is not None or self.__waiting:
+                    self.__cond.wait()
+            self.__readers[me] = self.__readers.get(me, 0) + 1
+        try:
+            yield
+        finally:
+            with self.__cond:
+                self.__readers[me] -= 1
+                if not self.__readers[me]:
+                    del self.__readers[me]
+                    self.__cond.notify_all()
+
+    @contextlib.contextmanager
+    def writing(self):
+        """holds the lock exclusively for the with block"""
+        me = threading.get_ident()
+        with self.__cond:
+            if self.__writer == me:
+                self.__depth += 1
+            else:
+                if me in self.__readers:
+                    raise RuntimeError("cannot upgrade a read lock")
+                self.__waiting += 1
+                while self.__writer is not None or self.__readers:
+                    self.__cond.wait()
+                self.__waiting -= 1
+                self.__writer = me
+                self.__depth = 1
+        try:
+            yield
+        finally:
+            with self.__cond:
+                self.__depth -= 1
+                if not self.__depth:
+                    self.__writer = None
+                    self.__cond.notify_all()
+
+
+def reads(method):
+    """runs the storage method holding its lock shared"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        """calls method with the read lock"""
+        with self.lock.reading():
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+def writes(method):
+    """runs the storage method holding its lock exclusively"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        """calls method with the write lock"""
+        with self.lock.writing():
+            return method(self, *args, **kwargs)
+    return wrapper
@@ -1,5 +1,6 @@
 #!/usr/bin/python3
 """ holds class User"""
+import hashlib
 import models
 from models.base_model import BaseModel, Base
 from os import getenv
@@ -44,17 +45,6 @@ class User(BaseModel, Base):
         else:
             self.__password = ""
 
-    def to_dict(self, *args, **kwargs):
-        """Returns a dictionary representation of the User object."""
-        new_dict = super().to_dict(*args, **kwargs)
-
-        # Exclude password from the dictionary for non-FileStorage cases
-        if 'password' in new_dict:
-            if not isinstance(self, models.User):
-                return new_dict
-
     def save(self):
-        """Save the User object to storage."""
-        if isinstance(models.storage, models.DBStorage):
-            self.password = hashlib.md5(self.password.encode()).hexdigest()
+        """Save the User object to storage (the setter already hashed it)."""
         super().save()
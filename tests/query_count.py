@@ -0,0 +1,25 @@
+#!/usr/bin/python3
+"""Test helper asserting how many SQL statements a block runs"""
+from contextlib import contextmanager
+from models import storage
+
+
+class QueryCountMixin:
+    """gives a TestCase assertMaxQueries()"""
+
+    @contextmanager
+    def assertMaxQueries(self, limit, msg=None):
+        """fails if the with block runs more than limit statements
+
+        With a storage that runs no SQL (FileStorage) the block is run
+        without any check.
+        """
+        if not hasattr(storage, "query_count"):
+            yield
+            return
+        start = storage.query_count()
+        yield
+        used = storage.query_count() - start
+        self.assertLessEqual(used, limit, msg or
+                             "{} queries, expected at most {}".format(
+                                 used, limit))
@@ -1,13 +1,20 @@
 #!/usr/bin/python3
+import base64
+import hashlib
+import os
 import unittest
+import models
 from api.v1.app import app
+from api.v1.views.cache import cache
 from flask import jsonify
+from tests.query_count import QueryCountMixin
 
-class TestApp(unittest.TestCase):
+class TestApp(QueryCountMixin, unittest.TestCase):
     def setUp(self):
         """Set up test environment before each test"""
         self.app = app.test_client()
         self.app.testing = True
+        cache.clear()
 
     def test_status_route(self):
         """Test the /status route"""
@@ -15,5 +22,415 @@ class TestApp(unittest.TestCase):
         self.assertEqual(response.status_code, 200)
         self.assertEqual(response.json, {"status": "OK"})
 
+    def test_states_pages(self):
+        """Test that /states can be walked page by page with cursors"""
+        from models import storage
+        from models.state import State
+        states = [State(name="Page {}".format(i)) for i in range(5)]
+        for state in states:
+            storage.new(state)
+        storage.save()
+        expected = [state.id for state in sorted(
+            storage.all(State).values(),
+            key=lambda state: (state.created_at, state.id))]
+        ids = []
+        url = '/api/v1/states?limit=2'
+        while url:
+            response = self.app.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.json), 2)
+            ids.extend(state["id"] for state in response.json)
+            cursor = response.headers.get("X-Next-Cursor")
+            url = cursor and '/api/v1/states?limit=2&cursor=' + cursor
+        self.assertEqual(ids, expected)
+        for state in states:
+            storage.delete(state)
+        storage.save()
+
+    def test_unpaged_list_is_streamed(self):
+        """Test that a list without ?limit= is streamed as one JSON array"""
+        from models import storage
+        from models.state import State
+        response = self.app.get('/api/v1/states')
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, "application/json")
+        self.assertEqual(sorted(state["id"] for state in response.json),
+                         sorted(state.id for state in
+                                storage.all(State).values()))
+
+    def test_bad_page_args(self):
+        """Test that a bad limit or cursor is a 400 JSON error"""
+        response = self.app.get('/api/v1/states?limit=zero')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json, {"error": "Invalid limit"})
+        response = self.app.get('/api/v1/users?cursor=nope')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json, {"error": "Invalid cursor"})
+        for raw in ('["2024-01-01T00:00:00", 5]',
+                    '["2024-01-01T00:00:00+00:00", "x"]'):
+            cursor = base64.urlsafe_b64encode(raw.encode()).decode()
+            response = self.app.get('/api/v1/states?cursor=' + cursor)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json, {"error": "Invalid cursor"})
+
+    def test_limit_is_capped(self):
+        """Test that a limit above the maximum is lowered to it"""
+        from api.v1.views.pagination import MAX_LIMIT, parse_page_args
+        self.assertEqual(parse_page_args(str(MAX_LIMIT * 10), None),
+                         (MAX_LIMIT, None))
+        self.assertEqual(parse_page_args("5", None), (5, None))
+
+    def test_cache_hits_and_invalidation(self):
+        """Test that a write only drops the cached lists of its class"""
+        def counters():
+            stats = self.app.get('/api/v1/cache/stats').json
+            return stats["hits"], stats["misses"]
+        self.app.get('/api/v1/states?limit=5')
+        self.app.get('/api/v1/amenities?limit=5')
+        hits, misses = counters()
+        first = self.app.get('/api/v1/amenities?limit=5')
+        self.app.get('/api/v1/states?limit=5')
+        self.assertEqual(counters(), (hits + 2, misses))
+        response = self.app.post('/api/v1/amenities', json={"name": "Spa"})
+        self.assertEqual(response.status_code, 201)
+        second = self.app.get('/api/v1/amenities?limit=5')
+        self.app.get('/api/v1/states?limit=5')
+        self.assertEqual(counters(), (hits + 3, misses + 1))
+        self.assertEqual(len(second.json), min(5, len(first.json) + 1))
+
+    def test_cached_stream(self):
+        """Test that a streamed list is cached once fully sent"""
+        # let the teardown reload pick up files written by other tests
+        self.app.get('/api/v1/status')
+        body = self.app.get('/api/v1/states').get_data()
+        hits = cache.stats()["hits"]
+        second = self.app.get('/api/v1/states')
+        self.assertEqual(cache.stats()["hits"], hits + 1)
+        self.assertEqual(second.get_data(), body)
+        self.assertEqual(second.mimetype, "application/json")
+
+    def test_object_etag(self):
+        """Test that a GET with the object's ETag gets an empty 304"""
+        from models import storage
+        from models.state import State
+        state = State(name="Tagged")
+        storage.new(state)
+        storage.save()
+        url = '/api/v1/states/' + state.id
+        etag = self.app.get(url).headers["ETag"]
+        response = self.app.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b"")
+        self.assertEqual(response.headers["ETag"], etag)
+        state.save()
+        response = self.app.get(url, headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        storage.delete(state)
+        storage.save()
+
+    def test_etags_within_one_second(self):
+        """Test that two updates in the same second change the ETags"""
+        from datetime import datetime
+        from models import storage
+        from models.state import State
+        state = State(name="Quick")
+        etags = []
+        for microsecond in (100, 200):
+            state.updated_at = datetime(2030, 1, 1, 12, 0, 0, microsecond)
+            storage.new(state)
+            storage.save()
+            etags.append((
+                self.app.get('/api/v1/states/' + state.id).headers["ETag"],
+                self.app.get('/api/v1/states?limit=1').headers["ETag"]))
+        self.assertNotEqual(etags[0][0], etags[1][0])
+        self.assertNotEqual(etags[0][1], etags[1][1])
+        storage.delete(state)
+        storage.save()
+
+    def test_list_etag(self):
+        """Test that a list ETag holds until its class changes"""
+        from models import storage
+        from models.state import State
+        etag = self.app.get('/api/v1/states?limit=3').headers["ETag"]
+        response = self.app.get('/api/v1/states?limit=3',
+                                headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        response = self.app.get('/api/v1/states?limit=2',
+                                headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        storage.new(State(name="Changed"))
+        response = self.app.get('/api/v1/states?limit=3',
+                                headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+
+    def test_cache_follows_versions(self):
+        """Test that a write the cache was not told of, e.g. by another
+        process, is not served from the cache under the new ETag"""
+        from models import storage
+        from unittest import mock
+        url = '/api/v1/states?limit=1000'
+        etag = self.app.get(url).headers["ETag"]
+        self.assertEqual(self.app.get(url).headers["ETag"], etag)
+        hits = cache.stats()["hits"]
+        versions = storage.versions
+
+        def written(names):
+            return {name: version + "+1"
+                    for name, version in versions(names).items()}
+        with mock.patch.object(storage, "versions", written):
+            response = self.app.get(url)
+        self.assertNotEqual(response.headers["ETag"], etag)
+        self.assertEqual(cache.stats()["hits"], hits)
+
+    def test_batch(self):
+        """Test that a batch reports each item and saves once"""
+        from models import storage
+        from models.state import State
+        from unittest import mock
+        kept = State(name="Kept")
+        gone = State(name="Gone")
+        storage.new(kept)
+        storage.new(gone)
+        storage.save()
+        body = {"create": [{"name": "New"}, {}],
+                "update": [{"id": kept.id, "name": "Renamed"},
+                           {"id": "missing"}],
+                "delete": [gone.id]}
+        with mock.patch.object(storage, "save", wraps=storage.save) as save:
+            response = self.app.post('/api/v1/states/batch', json=body)
+        self.assertEqual(save.call_count, 1)
+        self.assertEqual(response.status_code, 200)
+        results = response.json
+        self.assertEqual([r["status"] for r in results["create"]],
+                         [201, 400])
+        self.assertEqual(results["create"][1]["error"], "Missing name")
+        created = results["create"][0]["object"]
+        self.assertEqual(storage.get(State, created["id"]).name, "New")
+        self.assertEqual([r["status"] for r in results["update"]],
+                         [200, 404])
+        self.assertEqual(storage.get(State, kept.id).name, "Renamed")
+        self.assertEqual(results["delete"], [{"status": 200,
+                                              "id": gone.id}])
+        self.assertIsNone(storage.get(State, gone.id))
+        storage.delete(storage.get(State, kept.id))
+        storage.delete(storage.get(State, created["id"]))
+        storage.save()
+
+    def test_batch_checks_parents(self):
+        """Test that batch creates need existing parents"""
+        response = self.app.post('/api/v1/places/batch', json={
+            "create": [{"name": "Loft", "city_id": "nope",
+                        "user_id": "nope"}]})
+        self.assertEqual(response.json["create"],
+                         [{"status": 404, "error": "City not found"}])
+        response = self.app.post('/api/v1/nothing/batch', json={})
+        self.assertEqual(response.status_code, 404)
+        response = self.app.post('/api/v1/states/batch', data="x")
+        self.assertEqual(response.status_code, 400)
+
+    def test_batch_odd_ids(self):
+        """Test that batch ids of the wrong type or repeated are not found"""
+        from models import storage
+        from models.state import State
+        state = State(name="Twice")
+        storage.new(state)
+        storage.save()
+        response = self.app.post('/api/v1/states/batch', json={
+            "update": [{"id": ["x"], "name": "Bad"}],
+            "delete": [state.id, state.id, {"id": 1}]})
+        results = response.json
+        self.assertEqual(results["update"],
+                         [{"status": 404, "error": "Not found"}])
+        self.assertEqual([result["status"] for result in results["delete"]],
+                         [200, 404, 404])
+        self.assertIsNone(storage.get(State, state.id))
+
+    def test_place_amenity_ids_ignored(self):
+        """Test that amenity_ids is not set by a place update or batch"""
+        from models import storage
+        from models.city import City
+        from models.place import Place
+        from models.state import State
+        from models.user import User
+        state = State(name="Linked")
+        city = City(name="Linked", state_id=state.id)
+        user = User(email="linked@hbnb.io", password="pwd")
+        place = Place(name="Linked", city_id=city.id, user_id=user.id)
+        for obj in (state, city, user, place):
+            storage.new(obj)
+        storage.save()
+        url = '/api/v1/places/' + place.id
+        response = self.app.put(url, json={"amenity_ids": [{"x": 1}],
+                                           "name": "Renamed"})
+        self.assertEqual(response.status_code, 200)
+        response = self.app.post('/api/v1/places/batch', json={
+            "update": [{"id": place.id, "amenity_ids": [{"x": 1}]}]})
+        self.assertEqual(response.json["update"][0]["status"], 200)
+        place = storage.get(Place, place.id)
+        self.assertEqual(place.name, "Renamed")
+        self.assertEqual(self.app.get(url + "/amenities").json, [])
+        for obj in (place, user, city, state):
+            storage.delete(obj)
+        storage.save()
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_compact_amenity_links(self):
+        """Test linking amenities over the compact store, whose objects
+        are new instances on each access"""
+        from models.amenity import Amenity
+        from models.engine.compact_store import CompactObjects
+        from models.engine.file_storage import FileStorage
+        from models.place import Place
+        saved = (FileStorage._FileStorage__file_path,
+                 FileStorage._FileStorage__objects)
+        FileStorage._FileStorage__file_path = "test_compact_api.json"
+        FileStorage._FileStorage__objects = CompactObjects()
+        try:
+            place = Place(name="Loft")
+            amenity = Amenity(name="Wifi")
+            for obj in (place, amenity):
+                models.storage.new(obj)
+            models.storage.save()
+            url = '/api/v1/places/{}/amenities/{}'.format(place.id,
+                                                          amenity.id)
+            self.assertEqual(self.app.post(url).status_code, 201)
+            self.assertEqual(self.app.post(url).status_code, 200)
+            self.assertEqual(models.storage.get(Place, place.id).amenity_ids,
+                             [amenity.id])
+            self.assertEqual(self.app.delete(url).status_code, 200)
+            self.assertEqual(self.app.delete(url).status_code, 404)
+            self.assertEqual(models.storage.get(Place, place.id).amenity_ids,
+                             [])
+        finally:
+            (FileStorage._FileStorage__file_path,
+             FileStorage._FileStorage__objects) = saved
+            for path in ("test_compact_api.json",
+                         "test_compact_api.json.bak"):
+                if os.path.exists(path):
+                    os.remove(path)
+
+    def test_users_hide_password(self):
+        """Test that no password field is sent by the /users responses"""
+        from models import storage
+        from models.user import User
+        response = self.app.post('/api/v1/users', json={
+            "email": "secret@hbnb.io", "password": "secret"})
+        user = response.json
+        responses = [
+            response,
+            self.app.get('/api/v1/users/' + user["id"]),
+            self.app.get('/api/v1/users'),
+            self.app.get('/api/v1/users?limit=1000'),
+            self.app.put('/api/v1/users/' + user["id"],
+                         json={"first_name": "Sam"}),
+            self.app.post('/api/v1/users/batch', json={
+                "update": [{"id": user["id"], "last_name": "Doe"}]})]
+        for response in responses:
+            self.assertEqual(response.status_code, 200 if response
+                             is not responses[0] else 201)
+            body = response.get_data(as_text=True)
+            self.assertNotIn("password", body)
+            self.assertNotIn(hashlib.md5(b"secret").hexdigest(), body)
+        storage.delete(storage.get(User, user["id"]))
+        storage.save()
+
+    def test_places_search_checks_filters(self):
+        """Test that places_search filters must be lists of ids"""
+        for body, error in (({"states": [{}]}, "Invalid states"),
+                            ({"amenities": [[1]]}, "Invalid amenities"),
+                            ({"cities": "abc"}, "Invalid cities"),
+                            ([], "Not a JSON")):
+            response = self.app.post('/api/v1/places_search', json=body)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json, {"error": error})
+        response = self.app.post('/api/v1/places_search',
+                                 json={"states": ["nope"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json, [])
+
+    def test_metrics(self):
+        """Test that requests and storage calls show in /metrics"""
+        from api.v1.views.metrics import metrics
+        metrics.reset()
+        self.app.get('/api/v1/states/nope')
+        self.app.get('/api/v1/states/nope')
+        self.app.get('/api/v1/status')
+        text = self.app.get('/api/v1/metrics').get_data(as_text=True)
+        labels = 'route="/api/v1/states/<state_id>",method="GET"'
+        self.assertIn('hbnb_request_duration_seconds_count{%s} 2' % labels,
+                      text)
+        # a get() and the teardown close() per request
+        self.assertIn('hbnb_request_storage_calls_total{%s} 4' % labels,
+                      text)
+        self.assertIn('hbnb_request_storage_calls_total{route='
+                      '"/api/v1/status",method="GET"} 1', text)
+        self.assertIn('hbnb_storage_calls_total{method="get"} 2', text)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_metrics_reload_stats(self):
+        """Test that /metrics reports the last snapshot load"""
+        from models import storage
+        from unittest import mock
+        stats = {"path": "file.json", "objects": 3, "seconds": 0.5,
+                 "max_rss_kb": 1024}
+        with mock.patch.object(storage, "reload_stats",
+                               return_value=stats):
+            text = self.app.get('/api/v1/metrics').get_data(as_text=True)
+        self.assertIn("hbnb_file_reload_objects 3\n", text)
+        self.assertIn("hbnb_file_reload_seconds 0.5\n", text)
+        self.assertIn("hbnb_file_reload_max_rss_kb 1024\n", text)
+
+    def test_server_timing(self):
+        """Test that X-Timing: 1 asks for the Server-Timing breakdown"""
+        from models import storage
+        from models.state import State
+        state = State(name="Timed")
+        storage.new(state)
+        storage.save()
+        url = '/api/v1/states/' + state.id
+        self.assertNotIn("Server-Timing", self.app.get(url).headers)
+        timing = self.app.get(url, headers={"X-Timing": "1"}).headers[
+            "Server-Timing"]
+        self.assertIn('storage-get;dur=', timing)
+        self.assertIn('serialization-to_dict;dur=', timing)
+        self.assertIn('total;dur=', timing)
+        storage.delete(state)
+        storage.save()
+
+    def test_query_budgets(self):
+        """Test that the read endpoints run a fixed number of queries"""
+        from models import storage
+        from models.city import City
+        from models.place import Place
+        from models.state import State
+        from models.user import User
+        state = State(name="Budget")
+        city = City(name="Town", state_id=state.id)
+        user = User(email="budget@hbnb.io", password="pwd")
+        place = Place(name="Loft", city_id=city.id, user_id=user.id)
+        for obj in (state, city, user, place):
+            storage.new(obj)
+        storage.save()
+        budgets = {
+            '/api/v1/stats': 2,
+            '/api/v1/states/' + state.id: 1,
+            '/api/v1/states?limit=2': 2,
+            '/api/v1/states/{}/cities'.format(state.id): 3,
+            '/api/v1/cities/{}/places'.format(city.id): 3,
+            '/api/v1/places/{}/reviews'.format(place.id): 3,
+            '/api/v1/places/{}/amenities'.format(place.id): 3,
+        }
+        for url, budget in budgets.items():
+            with self.assertMaxQueries(budget, url):
+                self.app.get(url).get_data()
+        with self.assertMaxQueries(1):
+            self.app.post('/api/v1/places_search',
+                          json={"states": [state.id]}).get_data()
+        for obj in (place, user, city, state):
+            storage.delete(obj)
+        storage.save()
+
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
@@ -0,0 +1,83 @@
+#!/usr/bin/python3
+"""Tests of the ASGI entry point"""
+import asyncio
+import json
+import unittest
+import models
+from api.v1.app import app as flask_app
+from api.v1.asgi import app
+
+
+def call(method, path, query=b"", headers=(), body=b""):
+    """returns the status, headers and body of a request to the ASGI app"""
+    scope = {"type": "http", "method": method, "path": path,
+             "query_string": query, "headers": list(headers),
+             "http_version": "1.1", "root_path": ""}
+    messages = []
+
+    async def receive():
+        """hands the whole body at once"""
+        return {"type": "http.request", "body": body}
+
+    async def send(message):
+        """records the messages sent"""
+        messages.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return (messages[0]["status"], dict(messages[0]["headers"]),
+            b"".join(message.get("body", b"") for message in messages[1:]))
+
+
+class TestAsgi(unittest.TestCase):
+    def test_status(self):
+        """Test that /status answers through the ASGI app"""
+        status, headers, body = call("GET", "/api/v1/status")
+        self.assertEqual(status, 200)
+        self.assertEqual(json.loads(body), {"status": "OK"})
+        self.assertEqual(headers[b"content-length"], str(len(body)).encode())
+
+    def test_same_responses(self):
+        """Test that the ASGI app answers like the Flask app"""
+        from models import storage
+        from models.state import State
+        state = State(name="Asgi")
+        storage.new(state)
+        storage.save()
+        client = flask_app.test_client()
+        for path in ("/api/v1/states/" + state.id, "/api/v1/states/nope",
+                     "/api/v1/states/{}/cities".format(state.id),
+                     "/api/v1/stats", "/api/v1/nothing"):
+            status, headers, body = call("GET", path)
+            response = client.get(path)
+            self.assertEqual(status, response.status_code)
+            self.assertEqual(json.loads(body), response.json)
+            if "ETag" in response.headers:
+                etag = headers[b"etag"]
+                self.assertEqual(etag.decode(), response.headers["ETag"])
+                status, headers, body = call(
+                    "GET", path, headers=[(b"if-none-match", etag)])
+                self.assertEqual(status, 304)
+                self.assertEqual(body, b"")
+        storage.delete(state)
+        storage.save()
+
+    def test_write(self):
+        """Test that a POST goes through the Flask app"""
+        from models import storage
+        from models.state import State
+        status, headers, body = call(
+            "POST", "/api/v1/states",
+            headers=[(b"content-type", b"application/json")],
+            body=b'{"name": "Posted"}')
+        self.assertEqual(status, 201)
+        state = storage.get(State, json.loads(body)["id"])
+        self.assertEqual(state.name, "Posted")
+        storage.delete(state)
+        storage.save()
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_async_storage(self):
+        """Test that the read views use the async storage with db"""
+        self.assertIsNotNone(app.storage)
+        self.assertIsNotNone(app.match({"type": "http", "method": "GET",
+                                        "path": "/api/v1/states"}))
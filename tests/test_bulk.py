@@ -0,0 +1,85 @@
+#!/usr/bin/python3
+"""
+Contains the tests of the bulk import/export script
+"""
+
+import bulk
+import io
+import json
+import models
+from models.engine.file_storage import FileStorage
+from models.place import Place
+from models.state import State
+import os
+import pep8
+import unittest
+from unittest import mock
+
+
+class TestBulkDocs(unittest.TestCase):
+    """Tests to check the documentation and style of bulk.py"""
+    def test_pep8_conformance_bulk(self):
+        """Test that bulk.py conforms to PEP8."""
+        pep8s = pep8.StyleGuide(quiet=True)
+        result = pep8s.check_files(['bulk.py', 'tests/test_bulk.py'])
+        self.assertEqual(result.total_errors, 0,
+                         "Found code style errors (and warnings).")
+
+    def test_bulk_module_docstring(self):
+        """Test for the bulk.py module docstring"""
+        self.assertTrue(len(bulk.__doc__) >= 1, "bulk.py needs a docstring")
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestBulk(unittest.TestCase):
+    """Test bulk imports and exports with FileStorage"""
+    def setUp(self):
+        """Point FileStorage at an empty file"""
+        self.saved = (FileStorage._FileStorage__file_path,
+                      FileStorage._FileStorage__objects)
+        FileStorage._FileStorage__file_path = "test_bulk.json"
+        FileStorage._FileStorage__objects = {}
+
+    def tearDown(self):
+        """Restore FileStorage and remove the test files"""
+        (FileStorage._FileStorage__file_path,
+         FileStorage._FileStorage__objects) = self.saved
+        for path in ("test_bulk.json", "test_bulk.json.bak"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_import_jsonl_saves_once(self):
+        """Test that a chunked import writes a single snapshot"""
+        lines = [json.dumps(State(name="S{}".format(i)).to_dict())
+                 for i in range(5)]
+        with mock.patch.object(models.storage, "save") as save:
+            total = bulk.import_rows(io.StringIO("\n".join(lines)),
+                                     chunk=2)
+        self.assertEqual(total, 5)
+        self.assertEqual(save.call_count, 1)
+        self.assertEqual(sorted(state.name for state in
+                                models.storage.all(State).values()),
+                         ["S0", "S1", "S2", "S3", "S4"])
+
+    def test_jsonl_round_trip(self):
+        """Test that an export imports back into the same objects"""
+        state = State(name="California")
+        models.storage.new(state)
+        out = io.StringIO()
+        self.assertEqual(bulk.export_rows(out), 1)
+        FileStorage._FileStorage__objects = {}
+        bulk.import_rows(io.StringIO(out.getvalue()))
+        self.assertEqual(models.storage.get(State, state.id).to_dict(),
+                         state.to_dict())
+
+    def test_csv_round_trip(self):
+        """Test that CSV values come back with their types"""
+        place = Place(name="Loft", city_id="c", user_id="u",
+                      number_rooms=3, latitude=1.5, amenity_ids=["a"])
+        models.storage.new(place)
+        out = io.StringIO()
+        bulk.export_rows(out, "csv", "Place")
+        FileStorage._FileStorage__objects = {}
+        bulk.import_rows(io.StringIO(out.getvalue()), "csv")
+        copy = models.storage.get(Place, place.id)
+        self.assertEqual(copy.to_dict(), place.to_dict())
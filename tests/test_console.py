@@ -1,10 +1,15 @@
 #!/usr/bin/python3
 """
-Contains the class TestConsoleDocs
+Contains the classes TestConsoleDocs and TestConsoleCompact
 """
 
 import console
 import inspect
+import models
+from models.engine.compact_store import CompactObjects
+from models.engine.file_storage import FileStorage
+from models.place import Place
+import os
 import pep8
 import unittest
 HBNBCommand = console.HBNBCommand
@@ -39,3 +44,34 @@ class TestConsoleDocs(unittest.TestCase):
                          "HBNBCommand class needs a docstring")
         self.assertTrue(len(HBNBCommand.__doc__) >= 1,
                         "HBNBCommand class needs a docstring")
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestConsoleCompact(unittest.TestCase):
+    """Test the console over the compact store of FileStorage"""
+    def setUp(self):
+        """Point FileStorage at an empty file and a compact store"""
+        self.saved = (FileStorage._FileStorage__file_path,
+                      FileStorage._FileStorage__objects)
+        FileStorage._FileStorage__file_path = "test_console.json"
+        FileStorage._FileStorage__objects = CompactObjects()
+
+    def tearDown(self):
+        """Restore FileStorage and remove the test files"""
+        (FileStorage._FileStorage__file_path,
+         FileStorage._FileStorage__objects) = self.saved
+        for path in ("test_console.json", "test_console.json.bak"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_update(self):
+        """Test that update keeps the value set on a materialized object"""
+        place = Place(name="Loft")
+        models.storage.new(place)
+        HBNBCommand().onecmd('update Place {} number_rooms 3'.format(
+            place.id))
+        HBNBCommand().onecmd('update Place {} name "Big Loft"'.format(
+            place.id))
+        place = models.storage.get(Place, place.id)
+        self.assertEqual(place.number_rooms, 3)
+        self.assertEqual(place.name, "Big Loft")
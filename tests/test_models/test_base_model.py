@@ -138,6 +138,19 @@ class TestBaseModel(unittest.TestCase):
         self.assertEqual(new_d["created_at"], bm.created_at.strftime(t_format))
         self.assertEqual(new_d["updated_at"], bm.updated_at.strftime(t_format))
 
+    def test_to_dict_cached_timestamps(self):
+        """test that cached timestamp strings follow the datetime value"""
+        t_format = "%Y-%m-%dT%H:%M:%S.%f"
+        bm = BaseModel()
+        bm.created_at = datetime(2017, 9, 28, 21, 3, 54)
+        self.assertEqual(bm.to_dict()["created_at"],
+                         "2017-09-28T21:03:54.000000")
+        bm.updated_at = datetime(2017, 9, 28, 21, 5, 54, 11)
+        self.assertEqual(bm.to_dict()["updated_at"],
+                         bm.updated_at.strftime(t_format))
+        bm.password = "secret"
+        self.assertNotIn("password", bm.to_dict())
+
     def test_str(self):
         """test that the str method has the correct output"""
         inst = BaseModel()
@@ -108,4 +108,145 @@ class TestFileStorage(unittest.TestCase):
         models.storage.new(new_review)
         models.storage.save()
         self.assertEqual(models.storage.count(), initial_count + 1)
-        self.assertEqual(models.storage.count(Review), 1)
\ No newline at end of file
+        self.assertEqual(models.storage.count(Review), 1)
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_all_and_get_eager_load(self):
+        """Test that relationship paths can be loaded eagerly"""
+        state = State(name="California")
+        models.storage.new(state)
+        models.storage.new(City(name="San Jose", state_id=state.id))
+        models.storage.save()
+        for strategy in ("selectin", "joined"):
+            states = models.storage.all(State, load=["cities.places"],
+                                        strategy=strategy)
+            self.assertEqual(len(states["State." + state.id].cities), 1)
+        loaded = models.storage.get(State, state.id, load=["cities"])
+        self.assertEqual(loaded.cities[0].name, "San Jose")
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_query_log(self):
+        """Test that statements are counted and N+1 patterns reported"""
+        storage = models.storage
+        for i in range(3):
+            state = State(name="Lazy {}".format(i))
+            storage.new(state)
+            storage.new(City(name="Town", state_id=state.id))
+        storage.save()
+        storage.close()
+        start = storage.query_count()
+        states = storage.all(State).values()
+        for state in states:
+            state.cities
+        self.assertEqual(storage.query_count() - start, 1 + len(states))
+        self.assertEqual(storage.query_log().count, 1 + len(states))
+        storage.close()
+        self.assertEqual(storage.query_log().count, 0)
+        storage._DBStorage__repeated_queries = 2
+        storage._DBStorage__query_check = "raise"
+        try:
+            with self.assertRaises(db_storage.QueryBudgetError):
+                for state in storage.all(State).values():
+                    state.cities
+        finally:
+            storage._DBStorage__repeated_queries = 0
+            storage._DBStorage__query_check = "log"
+            storage.close()
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_get_many(self):
+        """Test that get_many reads every id with a single query"""
+        storage = models.storage
+        states = [State(name="Many {}".format(i)) for i in range(3)]
+        for state in states:
+            storage.new(state)
+        storage.save()
+        storage.close()
+        start = storage.query_count()
+        found = storage.get_many(State, [states[0].id, "missing",
+                                         states[2].id, 42])
+        self.assertEqual(storage.query_count() - start, 1)
+        self.assertEqual(sorted(found), sorted([states[0].id,
+                                                states[2].id]))
+        self.assertEqual(storage.get_many(State, []), {})
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_timestamps_keep_microseconds(self):
+        """Test that MySQL tables keep the microseconds of updated_at"""
+        from sqlalchemy.dialects import mysql
+        from sqlalchemy.schema import CreateTable
+        ddl = str(CreateTable(State.__table__).compile(
+            dialect=mysql.dialect()))
+        self.assertIn("created_at DATETIME(6)", ddl)
+        self.assertIn("updated_at DATETIME(6)", ddl)
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_changes_reported_per_session(self):
+        """Test that save() only reports the classes its thread flushed,
+        and nothing of a session rolled back"""
+        import threading
+        storage = models.storage
+        told = []
+        storage.subscribe(told.append)
+        flushed, saved = threading.Event(), threading.Event()
+        state = State(name="Elsewhere")
+
+        def other():
+            """flushes a state, commits it once the main thread saved"""
+            storage.new(state)
+            storage._DBStorage__session.flush()
+            flushed.set()
+            saved.wait(10)
+            storage.save()
+            storage.close()
+        try:
+            thread = threading.Thread(target=other)
+            thread.start()
+            flushed.wait(10)
+            storage.save()
+            self.assertEqual(told, [])
+            saved.set()
+            thread.join(10)
+            self.assertEqual(told, [frozenset(["State"])])
+            storage.new(City(name="Gone", state_id=state.id))
+            storage._DBStorage__session.flush()
+            storage._DBStorage__session.rollback()
+            storage.save()
+            self.assertEqual(len(told), 1)
+        finally:
+            storage._DBStorage__listeners.remove(told.append)
+            storage.delete(storage.get(State, state.id))
+            storage.save()
+            storage.close()
+
+    @unittest.skipIf(models.storage_t != 'db', "not testing db storage")
+    def test_stream(self):
+        """Test that stream() loads the rows a batch at a time"""
+        storage = models.storage
+        storage.close()
+        states = [State(name="Streamed {}".format(i)) for i in range(5)]
+        for state in states:
+            storage.new(state)
+        city = City(name="Streamed", state_id=states[0].id)
+        storage.new(city)
+        storage.save()
+        storage.close()
+        storage._DBStorage__stream_batch = 2
+        try:
+            objs = storage.stream(State)
+            self.assertNotIsInstance(objs, (list, dict))
+            first = next(objs)
+            session = storage._DBStorage__session()
+            self.assertLessEqual(len(session.identity_map), 2)
+            ids = [first.id] + [state.id for state in objs]
+            self.assertEqual(sorted(ids), sorted(s.id for s in
+                                                 storage.all(State).values()))
+            self.assertEqual([city.name for city in storage.stream(
+                City, "state_id", states[0].id)], ["Streamed"])
+        finally:
+            storage._DBStorage__stream_batch = 500
+            storage.delete(storage.get(City, city.id))
+            for state in states:
+                storage.delete(storage.get(State, state.id))
+            storage.save()
+            storage.close()
@@ -7,6 +7,8 @@ from datetime import datetime
 import inspect
 import models
 from models.engine import file_storage
+from models.engine.compact_store import CompactObjects
+from models.engine.rwlock import RWLock
 from models.amenity import Amenity
 from models.base_model import BaseModel
 from models.city import City
@@ -17,7 +19,12 @@ from models.user import User
 import json
 import os
 import pep8
+import subprocess
+import sys
+import tempfile
+import threading
 import unittest
+from unittest import mock
 FileStorage = file_storage.FileStorage
 classes = {"Amenity": Amenity, "BaseModel": BaseModel, "City": City,
            "Place": Place, "Review": Review, "State": State, "User": User}
@@ -113,7 +120,7 @@ class TestFileStorage(unittest.TestCase):
         with open("file.json", "r") as f:
             js = f.read()
         self.assertEqual(json.loads(string), json.loads(js))
-    
+
     @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
     def test_get(self):
         """Test the get method"""
@@ -123,6 +130,22 @@ class TestFileStorage(unittest.TestCase):
         storage.save()
         retrieved_instance = storage.get("BaseModel", new_instance.id)
         self.assertEqual(new_instance, retrieved_instance)
+        self.assertIsNone(storage.get(BaseModel, ["not", "an", "id"]))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_get_many(self):
+        """Test that get_many returns the objects found by id"""
+        storage = FileStorage()
+        states = [State(name="Many {}".format(i)) for i in range(3)]
+        for state in states:
+            storage.new(state)
+        ids = [states[0].id, "missing", states[2].id, 42, states[0].id]
+        found = storage.get_many(State, ids)
+        self.assertEqual(found, {states[0].id: states[0],
+                                 states[2].id: states[2]})
+        self.assertEqual(storage.get_many("City", [states[1].id]), {})
+        for state in states:
+            storage.delete(state)
 
     @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
     def test_count(self):
@@ -144,4 +167,559 @@ class TestFileStorage(unittest.TestCase):
         storage.new(new_instance)
         storage.save()
         updated_count = storage.count()
-        self.assertEqual(initial_count + 1, updated_count)
\ No newline at end of file
+        self.assertEqual(initial_count + 1, updated_count)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_counts(self):
+        """Test that counts returns the count of several classes at once"""
+        storage = FileStorage()
+        counts = storage.counts([State, "City"])
+        self.assertEqual(counts, {"State": storage.count(State),
+                                  "City": storage.count(City)})
+        storage.new(State())
+        self.assertEqual(storage.counts([State])["State"],
+                         counts["State"] + 1)
+        self.assertEqual(set(storage.counts()), set(classes))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_count_reads_class_index(self):
+        """Test that count follows new and delete without calling all"""
+        storage = FileStorage()
+        before = storage.count(State), storage.count()
+        state = State()
+        with mock.patch.object(FileStorage, "all",
+                               side_effect=AssertionError("all called")):
+            storage.new(state)
+            self.assertEqual((storage.count(State), storage.count()),
+                             (before[0] + 1, before[1] + 1))
+            storage.delete(state)
+            self.assertEqual((storage.count(State), storage.count()),
+                             before)
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_all_cls_uses_class_index(self):
+        """Test that all(cls) only returns objects of that class"""
+        storage = FileStorage()
+        state = State()
+        city = City(state_id=state.id)
+        storage.new(state)
+        storage.new(city)
+        states = storage.all(State)
+        self.assertIn("State." + state.id, states)
+        self.assertNotIn("City." + city.id, states)
+        self.assertEqual(states, storage.all("State"))
+        storage.delete(state)
+        storage.delete(city)
+        self.assertNotIn("State." + state.id, storage.all(State))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_all_by_foreign_key(self):
+        """Test that all_by follows new, delete and foreign key changes"""
+        storage = FileStorage()
+        state = State()
+        other = State()
+        city = City(state_id=state.id)
+        storage.new(city)
+        self.assertEqual(list(storage.all_by(City, "state_id",
+                                             state.id).values()), [city])
+        self.assertEqual(state.cities, [city])
+        city.state_id = other.id
+        storage.new(city)
+        self.assertEqual(state.cities, [])
+        self.assertEqual(other.cities, [city])
+        storage.delete(city)
+        self.assertEqual(other.cities, [])
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_search_places(self):
+        """Test that search_places intersects the state, city and amenity
+        indexes"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        FileStorage._FileStorage__objects = {}
+        try:
+            first, second = State(), State()
+            c1 = City(state_id=first.id)
+            c2 = City(state_id=second.id)
+            p1 = Place(city_id=c1.id, amenity_ids=["wifi", "pool"])
+            p2 = Place(city_id=c2.id, amenity_ids=["wifi"])
+            for obj in (first, second, c1, c2, p1, p2):
+                storage.new(obj)
+
+            def search(*args, **kwargs):
+                return set(storage.search_places(*args, **kwargs))
+            self.assertEqual(search(), {p1, p2})
+            self.assertEqual(search([first.id]), {p1})
+            self.assertEqual(search([first.id], [c2.id]), {p1, p2})
+            self.assertEqual(search(amenities=["wifi", "pool"]), {p1})
+            self.assertEqual(search([second.id], amenities=["wifi"]), {p2})
+            self.assertEqual(search(amenities=["spa"]), set())
+            p2.amenity_ids = ["wifi", "pool"]
+            storage.new(p2)
+            self.assertEqual(search(amenities=["pool"]), {p1, p2})
+        finally:
+            FileStorage._FileStorage__objects = save
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_new_rejects_unhashable_foreign_keys(self):
+        """Test that new() refuses foreign keys the indexes can not hold"""
+        storage = FileStorage()
+        place = Place(amenity_ids=[{"x": 1}])
+        with self.assertRaises(ValueError):
+            storage.new(place)
+        self.assertNotIn("Place." + place.id, storage.all())
+        self.assertNotIn("Place." + place.id, storage.all(Place))
+
+    @unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+    def test_index_rebuilt_when_objects_replaced(self):
+        """Test that indexes follow a replaced __objects dictionary"""
+        storage = FileStorage()
+        save = FileStorage._FileStorage__objects
+        state = State()
+        FileStorage._FileStorage__objects = {"State." + state.id: state}
+        try:
+            self.assertEqual(list(storage.all(State).values()), [state])
+        finally:
+            FileStorage._FileStorage__objects = save
+        self.assertNotIn("State." + state.id, storage.all(State))
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestFileStorageJournal(unittest.TestCase):
+    """Test the journaled save mode of FileStorage"""
+    def setUp(self):
+        """Point FileStorage at an empty file in journal mode"""
+        self.saved = (FileStorage._FileStorage__file_path,
+                      FileStorage._FileStorage__objects,
+                      FileStorage._FileStorage__journal,
+                      FileStorage._FileStorage__compact_after)
+        FileStorage._FileStorage__file_path = "test_journal.json"
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__journal = True
+        FileStorage._FileStorage__compact_after = 1000
+        self.storage = FileStorage()
+        self.journal = "test_journal.json.journal"
+
+    def tearDown(self):
+        """Restore FileStorage and remove the test files"""
+        (FileStorage._FileStorage__file_path,
+         FileStorage._FileStorage__objects,
+         FileStorage._FileStorage__journal,
+         FileStorage._FileStorage__compact_after) = self.saved
+        FileStorage._FileStorage__pending.clear()
+        FileStorage._FileStorage__journal_records = 0
+        for path in ("test_journal.json", self.journal):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_save_appends_only_changes(self):
+        """Test that save appends one record per new or deleted object"""
+        first = State(name="California")
+        self.storage.new(first)
+        self.storage.save()
+        second = State(name="Nevada")
+        self.storage.new(second)
+        self.storage.delete(first)
+        self.storage.save()
+        self.assertFalse(os.path.exists("test_journal.json"))
+        with open(self.journal) as f:
+            records = [json.loads(line) for line in f]
+        self.assertEqual([r["op"] for r in records],
+                         ["put", "put", "delete"])
+        self.assertEqual(records[1]["obj"]["name"], "Nevada")
+
+    def test_reload_replays_journal(self):
+        """Test that reload applies the journal on top of the file"""
+        kept = State(name="California")
+        gone = State(name="Nevada")
+        self.storage.new(kept)
+        self.storage.new(gone)
+        self.storage.compact()
+        self.storage.delete(gone)
+        kept.name = "Oregon"
+        self.storage.new(kept)
+        self.storage.save()
+        with open(self.journal, "a") as f:
+            f.write('{"op": "put", "key": "State.torn"')
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        states = self.storage.all(State)
+        self.assertEqual(list(states), ["State." + kept.id])
+        self.assertEqual(states["State." + kept.id].name, "Oregon")
+        added = State(name="Utah")
+        self.storage.new(added)
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertIn("State." + added.id, self.storage.all(State))
+
+    def test_close_applies_only_new_records(self):
+        """Test that close only replays records appended by others"""
+        self.storage.reload()
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        self.storage.close()
+        self.assertIs(self.storage.get(State, state.id), state)
+        other = State(name="Nevada")
+        with open(self.journal, "a") as f:
+            f.write(json.dumps({"op": "put", "key": "State." + other.id,
+                                "obj": other.to_dict()}) + "\n")
+        self.storage.close()
+        self.assertIs(self.storage.get(State, state.id), state)
+        self.assertEqual(self.storage.get(State, other.id).name, "Nevada")
+
+    def test_compaction(self):
+        """Test that the journal is folded into the file when it is full"""
+        FileStorage._FileStorage__compact_after = 2
+        for name in ("California", "Nevada"):
+            self.storage.new(State(name=name))
+            self.storage.save()
+        with open("test_journal.json") as f:
+            self.assertEqual(len(json.load(f)), 2)
+        self.assertEqual(os.path.getsize(self.journal), 0)
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestFileStorageSnapshot(unittest.TestCase):
+    """Test the atomic snapshot writes of FileStorage"""
+    def setUp(self):
+        """Point FileStorage at an empty file"""
+        self.saved = (FileStorage._FileStorage__file_path,
+                      FileStorage._FileStorage__objects)
+        FileStorage._FileStorage__file_path = "test_snapshot.json"
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage()
+
+    def tearDown(self):
+        """Restore FileStorage and remove the test files"""
+        (FileStorage._FileStorage__file_path,
+         FileStorage._FileStorage__objects) = self.saved
+        for path in ("test_snapshot.json", "test_snapshot.json.bak"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_save_keeps_previous_generation(self):
+        """Test that save leaves no temp file and keeps a .bak copy"""
+        first = State(name="California")
+        self.storage.new(first)
+        self.storage.save()
+        self.storage.new(State(name="Nevada"))
+        self.storage.save()
+        self.assertEqual([f for f in os.listdir(".") if f.endswith(".tmp")],
+                         [])
+        with open("test_snapshot.json.bak") as f:
+            self.assertEqual(list(json.load(f)), ["State." + first.id])
+
+    def test_reload_skips_unchanged_file(self):
+        """Test that reload does not re-create objects of the same file"""
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        self.storage.reload()
+        self.assertIs(self.storage.get(State, state.id), state)
+
+    def test_reload_keeps_unchanged_objects(self):
+        """Test that a changed file only replaces objects that changed"""
+        kept = State(name="California")
+        changed = State(name="Nevada")
+        self.storage.new(kept)
+        self.storage.new(changed)
+        self.storage.save()
+        with open("test_snapshot.json") as f:
+            jo = json.load(f)
+        jo["State." + changed.id]["name"] = "Utah"
+        jo["State." + changed.id]["updated_at"] = "2030-01-01T00:00:00.000000"
+        with open("test_snapshot.json", "w") as f:
+            json.dump(jo, f)
+        self.storage.close()
+        self.assertIs(self.storage.get(State, kept.id), kept)
+        self.assertEqual(self.storage.get(State, changed.id).name, "Utah")
+
+    def test_reload_falls_back_on_torn_file(self):
+        """Test that a truncated file falls back to the last generation"""
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        self.storage.new(State(name="Nevada"))
+        self.storage.save()
+        with open("test_snapshot.json", "r+") as f:
+            f.truncate(10)
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(list(self.storage.all(State)),
+                         ["State." + state.id])
+
+    def test_reload_keeps_nothing_of_a_torn_file(self):
+        """Test that the objects read before the tear are not stored"""
+        state = State(name="California")
+        self.storage.new(state)
+        self.storage.save()
+        other = State(name="Nevada")
+        self.storage.new(other)
+        self.storage.save()
+        with open("test_snapshot.json", "r+") as f:
+            f.truncate(len(f.read().rstrip()) - 1)
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(list(self.storage.all(State)),
+                         ["State." + state.id])
+
+    def test_reload_missing_file_is_empty(self):
+        """Test that a deleted file is not replaced by the .bak copy"""
+        self.storage.new(State(name="California"))
+        self.storage.save()
+        self.storage.new(State(name="Nevada"))
+        self.storage.save()
+        os.remove("test_snapshot.json")
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        self.assertEqual(self.storage.all(State), {})
+
+    def test_iter_json_objects_matches_json_load(self):
+        """Test that the streaming loader decodes like json.load"""
+        data = {"State.1": {"name": "a \"quoted\" {name}", "n": 12345},
+                "Place.2": {"latitude": 1.5e-3, "ok": True, "x": None,
+                            "amenity_ids": ["a", "b"]},
+                "Empty.3": {}}
+        text = json.dumps(data, indent=2)
+        for chunk_size in (1, 2, 7, 1 << 16):
+            with self.subTest(chunk_size=chunk_size):
+                with open("test_snapshot.json", "w") as f:
+                    f.write(text)
+                with open("test_snapshot.json") as f:
+                    self.assertEqual(dict(file_storage.iter_json_objects(
+                        f, chunk_size)), data)
+        with open("test_snapshot.json", "w") as f:
+            f.write(text[:-5])
+        with open("test_snapshot.json") as f:
+            with self.assertRaises(ValueError):
+                dict(file_storage.iter_json_objects(f, 7))
+
+    def test_reload_stats(self):
+        """Test that reload reports the objects loaded and the time taken"""
+        for name in ("California", "Nevada"):
+            self.storage.new(State(name=name))
+        self.storage.save()
+        FileStorage._FileStorage__objects = {}
+        self.storage.reload()
+        stats = self.storage.reload_stats()
+        self.assertEqual(stats["objects"], 2)
+        self.assertGreaterEqual(stats["seconds"], 0)
+        self.assertIn("max_rss_kb", stats)
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestFileStorageCompact(unittest.TestCase):
+    """Test FileStorage over the compact column store"""
+    def setUp(self):
+        """Point FileStorage at an empty file and a compact store"""
+        self.saved = (FileStorage._FileStorage__file_path,
+                      FileStorage._FileStorage__objects)
+        FileStorage._FileStorage__file_path = "test_compact.json"
+        FileStorage._FileStorage__objects = CompactObjects()
+        self.storage = FileStorage()
+
+    def tearDown(self):
+        """Restore FileStorage and remove the test files"""
+        (FileStorage._FileStorage__file_path,
+         FileStorage._FileStorage__objects) = self.saved
+        for path in ("test_compact.json", "test_compact.json.bak"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_objects_are_materialized(self):
+        """Test that get builds an equal copy of the stored object"""
+        place = Place(name="Loft", city_id="c1", amenity_ids=["a1"],
+                      number_rooms=2, latitude=1.5)
+        self.storage.new(place)
+        copy = self.storage.get(Place, place.id)
+        self.assertIsNot(copy, place)
+        self.assertIsInstance(copy, Place)
+        self.assertEqual(copy.__dict__, place.__dict__)
+        copy.amenity_ids.append("a2")
+        self.assertEqual(self.storage.get(Place, place.id).amenity_ids,
+                         ["a1"])
+
+    def test_foreign_keys_are_interned(self):
+        """Test that ids and foreign keys share one string per value"""
+        state = State(name="California")
+        self.storage.new(state)
+        for name in ("Fremont", "Napa"):
+            self.storage.new(City(name=name, state_id="".join(state.id)))
+        column = self.storage.all().of_class("City").columns["state_id"]
+        self.assertIs(column[0], column[1])
+        self.assertIs(column[0], sys.intern(state.id))
+
+    def test_indexes(self):
+        """Test the class and foreign key lookups on the compact store"""
+        state = State(name="California")
+        city = City(name="Fremont", state_id=state.id)
+        for obj in (state, city, City(name="Reno", state_id="other")):
+            self.storage.new(obj)
+        self.assertEqual(self.storage.count(City), 2)
+        self.assertEqual(list(self.storage.all_by(City, "state_id",
+                                                  state.id)),
+                         ["City." + city.id])
+        self.assertEqual([c.name for c in state.cities], ["Fremont"])
+        self.storage.delete(city)
+        self.assertEqual(self.storage.all_by(City, "state_id", state.id),
+                         {})
+        self.assertEqual(self.storage.count(), 2)
+
+    def test_save_reload(self):
+        """Test that a save and reload round trip keeps every attribute"""
+        user = User(email="a@b.c", password="pwd")
+        self.storage.new(user)
+        self.storage.save()
+        FileStorage._FileStorage__objects = CompactObjects()
+        self.storage.reload()
+        copy = self.storage.get(User, user.id)
+        self.assertEqual(copy.to_dict(), user.to_dict())
+        self.assertEqual(copy.password, user.password)
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+@unittest.skipIf(file_storage.fcntl is None, "no fcntl locks")
+class TestFileStorageLocking(unittest.TestCase):
+    """Test FileStorage shared by several processes"""
+    def setUp(self):
+        """Point FileStorage at an empty file in locking mode"""
+        self.saved = (FileStorage._FileStorage__file_path,
+                      FileStorage._FileStorage__objects,
+                      FileStorage._FileStorage__locking)
+        FileStorage._FileStorage__file_path = "test_locking.json"
+        FileStorage._FileStorage__objects = {}
+        FileStorage._FileStorage__locking = True
+        self.storage = FileStorage()
+
+    def tearDown(self):
+        """Restore FileStorage and remove the test files"""
+        (FileStorage._FileStorage__file_path,
+         FileStorage._FileStorage__objects,
+         FileStorage._FileStorage__locking) = self.saved
+        FileStorage._FileStorage__pending.clear()
+        for path in ("test_locking.json", "test_locking.json.bak",
+                     "test_locking.json.lock"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_save_merges_other_writers(self):
+        """Test that save keeps what another process added and deleted"""
+        gone = State(name="Gone")
+        self.storage.new(gone)
+        self.storage.save()
+        other = State(name="Other")
+        with open("test_locking.json") as f:
+            on_disk = json.load(f)
+        del on_disk["State." + gone.id]
+        on_disk["State." + other.id] = other.to_dict()
+        with open("test_locking.json.tmp", "w") as f:
+            json.dump(on_disk, f)
+        os.replace("test_locking.json.tmp", "test_locking.json")
+        mine = State(name="Mine")
+        self.storage.new(mine)
+        self.storage.save()
+        with open("test_locking.json") as f:
+            keys = set(json.load(f))
+        self.assertEqual(keys, {"State." + other.id, "State." + mine.id})
+        self.assertIsNone(self.storage.get(State, gone.id))
+
+    def test_concurrent_processes(self):
+        """Test that processes saving at once lose no object"""
+        script = ("from models import storage\n"
+                  "from models.state import State\n"
+                  "for i in range(15):\n"
+                  "    storage.new(State(name='p'))\n"
+                  "    storage.save()\n")
+        env = dict(os.environ, HBNB_FILE_LOCK="1",
+                   PYTHONPATH=os.getcwd())
+        with tempfile.TemporaryDirectory() as tmp:
+            procs = [subprocess.Popen([sys.executable, "-c", script],
+                                      cwd=tmp, env=env)
+                     for _ in range(4)]
+            for proc in procs:
+                self.assertEqual(proc.wait(), 0)
+            with open(os.path.join(tmp, "file.json")) as f:
+                self.assertEqual(len(json.load(f)), 60)
+
+
+@unittest.skipIf(models.storage_t == 'db', "not testing file storage")
+class TestFileStorageThreads(unittest.TestCase):
+    """Test FileStorage used by several threads"""
+    def setUp(self):
+        """Point FileStorage at an empty file"""
+        self.saved = (FileStorage._FileStorage__file_path,
+                      FileStorage._FileStorage__objects)
+        FileStorage._FileStorage__file_path = "test_threads.json"
+        FileStorage._FileStorage__objects = {}
+        self.storage = FileStorage()
+
+    def tearDown(self):
+        """Restore FileStorage and remove the test files"""
+        (FileStorage._FileStorage__file_path,
+         FileStorage._FileStorage__objects) = self.saved
+        for path in ("test_threads.json", "test_threads.json.bak"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_concurrent_reads_and_writes(self):
+        """Test that threads reading while others save see no error"""
+        errors = []
+        state = State(name="California")
+        self.storage.new(state)
+
+        def write():
+            """adds cities and saves after each one"""
+            try:
+                for i in range(30):
+                    self.storage.new(City(name="c", state_id=state.id))
+                    self.storage.save()
+            except Exception as e:
+                errors.append(e)
+
+        def read():
+            """pages through the cities while they are written"""
+            try:
+                for i in range(100):
+                    self.storage.all(City, limit=5)
+                    self.storage.all_by(City, "state_id", state.id)
+                    self.storage.count(City)
+            except Exception as e:
+                errors.append(e)
+        threads = [threading.Thread(target=target)
+                   for target in (write, write, read, read, read)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertEqual(self.storage.count(City), 60)
+        with open("test_threads.json") as f:
+            self.assertEqual(len(json.load(f)), 61)
+
+    def test_rwlock(self):
+        """Test that the writer may read but a reader can't upgrade"""
+        lock = RWLock()
+        with lock.writing():
+            with lock.reading():
+                with lock.writing():
+                    pass
+        with lock.reading():
+            with lock.reading():
+                with self.assertRaises(RuntimeError):
+                    with lock.writing():
+                        pass
+        order = []
+
+        def write():
+            """records when the writer got the lock"""
+            with lock.writing():
+                order.append("write")
+        with lock.reading():
+            thread = threading.Thread(target=write)
+            thread.start()
+            thread.join(0.1)
+            order.append("read")
+        thread.join()
+        self.assertEqual(order, ["read", "write"])
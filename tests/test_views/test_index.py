@@ -14,5 +14,15 @@ class TestIndex(unittest.TestCase):
         self.assertEqual(response.status_code, 200)  # Check if the status code is 200 OK
         self.assertEqual(response.json, {"status": "OK"})  # Check if the response matches the expected JSON
 
+    def test_stats_route(self):
+        """Test the /stats route"""
+        response = self.app.get('/api/v1/stats')  # Send a GET request
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(response.json), ["amenities", "cities",
+                                                 "places", "reviews",
+                                                 "states", "users"])
+        for count in response.json.values():
+            self.assertIsInstance(count, int)  # One count per class
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file